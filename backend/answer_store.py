@@ -0,0 +1,234 @@
+"""
+Persistent answer store for Maryland OLP AI Chat
+Keeps LLM answers across restarts in an append-only SQLite log (WAL mode)
+so a redeployed container starts with a warm answer cache
+
+Writes go through a bounded queue drained by a background thread, so the
+request path never waits on disk.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    query TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    created REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS answers_query ON answers (query);
+"""
+
+STORE_SIZE = "SELECT COUNT(*), COALESCE(SUM(LENGTH(query) + LENGTH(answer)), 0) FROM answers"
+
+
+def normalize_query(query: str) -> str:
+    """Key used for cached answers"""
+    return " ".join(query.lower().split())
+
+
+class AnswerCache:
+    """Small in-process LRU of normalized query -> (answer, provider)"""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> tuple[str, str] | None:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, answer: str, provider: str) -> None:
+        with self.lock:
+            self.entries[key] = (answer, provider)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class AnswerStore:
+    """Append-only SQLite log of answers with background writes and compaction
+
+    The writer tracks the stored rows and bytes (query + answer length) and
+    compacts as soon as either limit is exceeded, so the store is back within
+    max_rows / max_bytes after every write batch. Compaction trims to 90% of
+    each limit so that a store sitting at its cap isn't compacted on every write.
+    """
+
+    def __init__(self, path: str, max_rows: int = 50000, max_bytes: int = 64 * 1024 * 1024,
+                 queue_size: int = 1000):
+        self.path = path
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.written = 0
+        self.rows = 0
+        self.bytes = 0
+        self.compactions = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+        self.thread = threading.Thread(target=self._writer, name="answer-store", daemon=True)
+        self.thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # ---------- Request path (never blocks) ----------
+
+    def record_answer(self, key: str, answer: str, provider: str) -> bool:
+        """Queue a new answer for persistence; drops it if the writer is behind"""
+        return self._enqueue(("answer", key, answer, provider, time.time()))
+
+    def record_hit(self, key: str) -> bool:
+        """Queue a cache hit so repeat demand survives restarts"""
+        return self._enqueue(("hit", key))
+
+    def _enqueue(self, item: tuple) -> bool:
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    # ---------- Boot ----------
+
+    def load(self, limit: int | None = None) -> list[dict]:
+        """Latest answer per query, most recent first"""
+        limit = limit or self.max_rows
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                """
+                SELECT a.query, a.answer, a.provider, a.created, g.hits
+                FROM answers a
+                JOIN (SELECT MAX(id) AS id, SUM(hits) AS hits FROM answers GROUP BY query) g
+                  ON a.id = g.id
+                ORDER BY a.id DESC
+                LIMIT ?
+                """,
+                (limit,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [
+            {"query": q, "answer": a, "provider": p, "created": c, "hits": h}
+            for q, a, p, c, h in rows
+        ]
+
+    def warm(self, cache: AnswerCache) -> int:
+        """Fill the answer cache from disk"""
+        rows = self.load(cache.max_entries)
+        # Insert oldest first so the most recent answers end up hottest in the LRU
+        for row in reversed(rows):
+            cache.put(row["query"], row["answer"], row["provider"])
+        return len(rows)
+
+    # ---------- Writer thread ----------
+
+    def _writer(self):
+        conn = self._connect()
+        self._compact(conn)
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            batch = [item]
+            # Drain whatever else is waiting into the same transaction
+            while len(batch) < 100:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self.queue.put(None)
+                    break
+                batch.append(item)
+            try:
+                with conn:
+                    for op in batch:
+                        if op[0] == "answer":
+                            conn.execute(
+                                "INSERT INTO answers (query, answer, provider, created) VALUES (?, ?, ?, ?)",
+                                op[1:]
+                            )
+                            self.rows += 1
+                            self.bytes += len(op[1]) + len(op[2])
+                        else:
+                            conn.execute(
+                                "UPDATE answers SET hits = hits + 1 WHERE id = "
+                                "(SELECT MAX(id) FROM answers WHERE query = ?)",
+                                (op[1],)
+                            )
+                self.written += len(batch)
+                if self.rows > self.max_rows or self.bytes > self.max_bytes:
+                    self._compact(conn)
+            except sqlite3.Error as e:
+                print(f"Answer store error: {e}")
+        conn.close()
+
+    def _compact(self, conn: sqlite3.Connection) -> None:
+        """Keep only the latest answer per query and trim to the low-water marks"""
+        low_rows = max(self.max_rows * 9 // 10, 1)
+        low_bytes = self.max_bytes * 9 // 10
+        try:
+            with conn:
+                # Fold older rows' hit counts into the latest row for each query
+                conn.execute(
+                    """
+                    UPDATE answers SET hits = (
+                        SELECT SUM(hits) FROM answers older WHERE older.query = answers.query
+                    )
+                    WHERE id IN (SELECT MAX(id) FROM answers GROUP BY query)
+                    """
+                )
+                conn.execute("DELETE FROM answers WHERE id NOT IN (SELECT MAX(id) FROM answers GROUP BY query)")
+                conn.execute(
+                    "DELETE FROM answers WHERE id NOT IN (SELECT id FROM answers ORDER BY id DESC LIMIT ?)",
+                    (low_rows,)
+                )
+                # Trim oldest entries until the payload fits the byte budget
+                rows, total = conn.execute(STORE_SIZE).fetchone()
+                while total > low_bytes:
+                    conn.execute(
+                        "DELETE FROM answers WHERE id IN (SELECT id FROM answers ORDER BY id LIMIT "
+                        "(SELECT MAX(COUNT(*) / 10, 1) FROM answers))"
+                    )
+                    rows, total = conn.execute(STORE_SIZE).fetchone()
+                self.rows, self.bytes = rows, total
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.compactions += 1
+        except sqlite3.Error as e:
+            print(f"Answer store compaction error: {e}")
+
+    def close(self, timeout: float = 5) -> None:
+        """Flush queued writes and stop the writer thread"""
+        if not self.thread.is_alive():
+            return
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self.thread.join(timeout)
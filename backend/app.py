@@ -6,14 +6,44 @@ Supports: Local Ollama, llama.cpp, API (OpenRouter/Anthropic/OpenAI), FAQ fallba
 
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+import atexit
+import gc
+import hmac
+import json
 import os
-import requests
-from dotenv import load_dotenv
-
-# Import FAQ data
-from faq_data import find_best_match, FAQ_INDEX, FIVE_DOMAINS, KEYWORD_MAP
-
-load_dotenv()
+import sqlite3
+import time
+
+# FAQ search index (see faq_index.py)
+from faq_index import FAQEntry, build_index, match_query
+from answer_store import AnswerCache, AnswerStore, normalize_query
+from query_log import QueryLog
+from responses import faq_entry_json, faq_response, fallback_response, llm_response
+from shared_state import create_state
+from profiler import RequestProfiler
+
+# Only pay for python-dotenv when there is a .env file to read
+# (containers get their settings from env_file instead)
+if os.path.exists(".env") or os.path.exists(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")):
+    from dotenv import load_dotenv
+    load_dotenv()
+
+SEARCH_INDEX = build_index()
+FAQ_INDEX = SEARCH_INDEX["faq_index"]
+FIVE_DOMAINS = SEARCH_INDEX["five_domains"]
+KEYWORD_MAP = SEARCH_INDEX["keyword_map"]
+QUERY_NORMALIZER = SEARCH_INDEX["normalizer"]
+
+# Static API responses, encoded once
+DOMAINS_JSON = json.dumps({"domains": FIVE_DOMAINS}).encode()
+FAQ_TOPICS_JSON = json.dumps({
+    "topics": [{"topic": key, "category": entry.category} for key, entry in FAQ_INDEX.items()]
+}).encode()
+
+
+def find_best_match(query: str, metrics=None) -> FAQEntry | None:
+    """Find the best FAQ match using the search index"""
+    return match_query(query, FAQ_INDEX, KEYWORD_MAP, QUERY_NORMALIZER, metrics)
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend requests
@@ -37,6 +67,49 @@ OPENROUTER_MODEL = os.environ.get("OPENROUTER_MODEL", "deepseek/deepseek-r1-dist
 ANTHROPIC_API_KEY = os.environ.get("ANTHROPIC_API_KEY", "")
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
 
+# Providers each mode tries in order, and the HTTP timeout (seconds) of each call
+PROVIDER_CHAINS = {
+    "faq": (),
+    "ollama": ("ollama",),
+    "llamacpp": ("llamacpp",),
+    "api": ("openrouter", "anthropic", "openai"),  # cheapest first
+    "hybrid": ("ollama", "llamacpp", "openrouter", "anthropic", "openai"),  # local → cheap API → premium API
+}
+PROVIDER_TIMEOUTS = {"ollama": 60, "llamacpp": 60, "openrouter": 30, "anthropic": 30, "openai": 30}
+
+
+def chain_timeout(mode: str) -> float:
+    """Worst-case seconds for one question to go through the mode's fallback chain"""
+    return sum(PROVIDER_TIMEOUTS[provider] for provider in PROVIDER_CHAINS.get(mode, ()))
+
+
+# Persistent answer store (LLM answers survive restarts; empty path disables)
+ANSWER_STORE_PATH = os.environ.get("ANSWER_STORE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "answers.db"))
+ANSWER_STORE_MAX_ROWS = int(os.environ.get("ANSWER_STORE_MAX_ROWS", 50000))
+ANSWER_STORE_MAX_MB = int(os.environ.get("ANSWER_STORE_MAX_MB", 64))
+ANSWER_CACHE_SIZE = int(os.environ.get("ANSWER_CACHE_SIZE", 1000))
+
+# Shared state across workers, e.g. redis://localhost:6379/0 (empty = in-process only)
+SHARED_STATE_URL = os.environ.get("SHARED_STATE_URL", "")
+# How long other requests wait for an identical question already at the LLM.
+# Also the lifetime of the single-flight lock, so the default covers every
+# provider timeout in the mode's fallback chain (210 s for hybrid)
+SINGLE_FLIGHT_TIMEOUT = float(os.environ.get("SINGLE_FLIGHT_TIMEOUT", chain_timeout(LLM_MODE) + 5))
+# Per-client chat requests per minute (0 disables rate limiting)
+CHAT_RATE_LIMIT = float(os.environ.get("CHAT_RATE_LIMIT", 0))
+CHAT_RATE_BURST = int(os.environ.get("CHAT_RATE_BURST", 10))
+
+# Query log for FAQ candidate analytics (see faq_analytics.py; empty path disables)
+QUERY_LOG_PATH = os.environ.get("QUERY_LOG_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "queries.jsonl"))
+QUERY_LOG_MAX_MB = int(os.environ.get("QUERY_LOG_MAX_MB", 50))
+QUERY_LOG_BACKUPS = int(os.environ.get("QUERY_LOG_BACKUPS", 5))
+
+# Profiling (opt-in): keep sampled profiles of requests slower than this (0 disables)
+PROFILE_SLOW_MS = float(os.environ.get("PROFILE_SLOW_MS", 0))
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", 5))
+# Bearer token for /api/admin/* endpoints (empty disables them)
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
 # System prompt for LLM
 SYSTEM_PROMPT = """You are the Maryland Outdoor Learning Partnership (OLP) AI Assistant.
 You help educators, partners, and community members learn about environmental literacy in Maryland.
@@ -50,6 +123,58 @@ Key facts:
 
 Be helpful, accurate, and concise. Focus on Maryland-specific environmental education information."""
 
+# Provider HTTP client, imported only for modes that call an LLM
+requests = None
+
+
+def get_http():
+    """Import requests on first use so faq mode never loads it"""
+    global requests
+    if requests is None:
+        import requests as requests_module
+        requests = requests_module
+    return requests
+
+
+if LLM_MODE != "faq":
+    get_http()
+
+
+# ============================================
+# Answer Cache & Persistent Store
+# ============================================
+
+answer_cache = AnswerCache(ANSWER_CACHE_SIZE)
+answer_store = None
+
+if LLM_MODE != "faq" and ANSWER_STORE_PATH:
+    try:
+        answer_store = AnswerStore(
+            ANSWER_STORE_PATH,
+            max_rows=ANSWER_STORE_MAX_ROWS,
+            max_bytes=ANSWER_STORE_MAX_MB * 1024 * 1024
+        )
+        warmed = answer_store.warm(answer_cache)
+        print(f"Answer store: warmed {warmed} cached answers from {ANSWER_STORE_PATH}")
+        atexit.register(answer_store.close)
+    except (OSError, sqlite3.Error) as e:
+        print(f"Answer store disabled: {e}")
+        answer_store = None
+
+shared_state = create_state(SHARED_STATE_URL, answer_cache)
+atexit.register(shared_state.flush)
+
+profiler = RequestProfiler(PROFILE_SLOW_MS, PROFILE_INTERVAL_MS) if PROFILE_SLOW_MS > 0 else None
+
+query_log = None
+
+if LLM_MODE != "faq" and QUERY_LOG_PATH:
+    try:
+        query_log = QueryLog(QUERY_LOG_PATH, QUERY_LOG_MAX_MB * 1024 * 1024, QUERY_LOG_BACKUPS)
+        atexit.register(query_log.close)
+    except OSError as e:
+        print(f"Query log disabled: {e}")
+
 
 # ============================================
 # LLM Provider Functions
@@ -58,14 +183,14 @@ Be helpful, accurate, and concise. Focus on Maryland-specific environmental educ
 def call_ollama(query: str) -> str | None:
     """Call local Ollama server"""
     try:
-        response = requests.post(
+        response = get_http().post(
             f"{OLLAMA_URL}/api/generate",
             json={
                 "model": OLLAMA_MODEL,
                 "prompt": f"{SYSTEM_PROMPT}\n\nUser: {query}\n\nAssistant:",
                 "stream": False
             },
-            timeout=60
+            timeout=PROVIDER_TIMEOUTS["ollama"]
         )
         if response.ok:
             return response.json().get("response", "").strip()
@@ -77,7 +202,7 @@ def call_ollama(query: str) -> str | None:
 def call_llamacpp(query: str) -> str | None:
     """Call local llama.cpp server (OpenAI-compatible API)"""
     try:
-        response = requests.post(
+        response = get_http().post(
             f"{LLAMACPP_URL}/v1/chat/completions",
             json={
                 "messages": [
@@ -86,7 +211,7 @@ def call_llamacpp(query: str) -> str | None:
                 ],
                 "max_tokens": 1024
             },
-            timeout=60
+            timeout=PROVIDER_TIMEOUTS["llamacpp"]
         )
         if response.ok:
             return response.json()["choices"][0]["message"]["content"].strip()
@@ -100,7 +225,7 @@ def call_openrouter(query: str) -> str | None:
     if not OPENROUTER_API_KEY:
         return None
     try:
-        response = requests.post(
+        response = get_http().post(
             "https://openrouter.ai/api/v1/chat/completions",
             headers={
                 "Authorization": f"Bearer {OPENROUTER_API_KEY}",
@@ -113,7 +238,7 @@ def call_openrouter(query: str) -> str | None:
                     {"role": "user", "content": query}
                 ]
             },
-            timeout=30
+            timeout=PROVIDER_TIMEOUTS["openrouter"]
         )
         if response.ok:
             return response.json()["choices"][0]["message"]["content"].strip()
@@ -127,7 +252,7 @@ def call_anthropic(query: str) -> str | None:
     if not ANTHROPIC_API_KEY:
         return None
     try:
-        response = requests.post(
+        response = get_http().post(
             "https://api.anthropic.com/v1/messages",
             headers={
                 "x-api-key": ANTHROPIC_API_KEY,
@@ -140,7 +265,7 @@ def call_anthropic(query: str) -> str | None:
                 "system": SYSTEM_PROMPT,
                 "messages": [{"role": "user", "content": query}]
             },
-            timeout=30
+            timeout=PROVIDER_TIMEOUTS["anthropic"]
         )
         if response.ok:
             return response.json()["content"][0]["text"].strip()
@@ -154,7 +279,7 @@ def call_openai(query: str) -> str | None:
     if not OPENAI_API_KEY:
         return None
     try:
-        response = requests.post(
+        response = get_http().post(
             "https://api.openai.com/v1/chat/completions",
             headers={
                 "Authorization": f"Bearer {OPENAI_API_KEY}",
@@ -167,7 +292,7 @@ def call_openai(query: str) -> str | None:
                     {"role": "user", "content": query}
                 ]
             },
-            timeout=30
+            timeout=PROVIDER_TIMEOUTS["openai"]
         )
         if response.ok:
             return response.json()["choices"][0]["message"]["content"].strip()
@@ -176,48 +301,21 @@ def call_openai(query: str) -> str | None:
     return None
 
 
-def get_llm_response(query: str) -> tuple[str | None, str]:
-    """Get response based on configured LLM_MODE with fallback chain"""
-
-    if LLM_MODE == "ollama":
-        result = call_ollama(query)
-        if result:
-            return result, "ollama"
-
-    elif LLM_MODE == "llamacpp":
-        result = call_llamacpp(query)
-        if result:
-            return result, "llamacpp"
+PROVIDER_CALLS = {
+    "ollama": call_ollama,
+    "llamacpp": call_llamacpp,
+    "openrouter": call_openrouter,
+    "anthropic": call_anthropic,
+    "openai": call_openai,
+}
 
-    elif LLM_MODE == "api":
-        # Try OpenRouter first (cheapest), then Anthropic, then OpenAI
-        result = call_openrouter(query)
-        if result:
-            return result, "openrouter"
-        result = call_anthropic(query)
-        if result:
-            return result, "anthropic"
-        result = call_openai(query)
-        if result:
-            return result, "openai"
 
-    elif LLM_MODE == "hybrid":
-        # Full fallback chain: local → cheap API → premium API
-        result = call_ollama(query)
-        if result:
-            return result, "ollama"
-        result = call_llamacpp(query)
-        if result:
-            return result, "llamacpp"
-        result = call_openrouter(query)
-        if result:
-            return result, "openrouter"
-        result = call_anthropic(query)
-        if result:
-            return result, "anthropic"
-        result = call_openai(query)
+def get_llm_response(query: str) -> tuple[str | None, str]:
+    """Get response based on configured LLM_MODE with fallback chain"""
+    for provider in PROVIDER_CHAINS.get(LLM_MODE, ()):
+        result = PROVIDER_CALLS[provider](query)
         if result:
-            return result, "openai"
+            return result, provider
 
     return None, "none"
 
@@ -245,10 +343,24 @@ class Node:
         return exec_result
 
     def run(self, shared):
+        if profiler is not None:
+            return self.run_profiled(shared)
         prep_result = self.prep(shared)
         exec_result = self.exec(prep_result)
         return self.post(shared, exec_result)
 
+    def run_profiled(self, shared):
+        """run() with time and stack samples attributed to this node"""
+        name = type(self).__name__
+        profiler.enter_node(name)
+        start = time.perf_counter()
+        try:
+            prep_result = self.prep(shared)
+            exec_result = self.exec(prep_result)
+            return self.post(shared, exec_result)
+        finally:
+            profiler.exit_node(name, (time.perf_counter() - start) * 1000)
+
 
 class FAQSearchNode(Node):
     """Search pre-indexed FAQ data for matching responses"""
@@ -260,8 +372,8 @@ class FAQSearchNode(Node):
         if not query:
             return None
 
-        # Try to find a match in FAQ index
-        result = find_best_match(query)
+        # Try to find a match in FAQ index (chat matches feed the health metrics)
+        result = find_best_match(query, shared_state)
         return result
 
     def post(self, shared, result):
@@ -277,51 +389,19 @@ class ResponseFormatterNode(Node):
     """Format the response for the chat interface"""
 
     def prep(self, shared):
-        return {
-            "has_faq": shared.get("has_faq_match", False),
-            "faq_match": shared.get("faq_match"),
-            "has_llm": shared.get("has_llm_response", False),
-            "llm_response": shared.get("llm_response"),
-            "llm_source": shared.get("llm_source"),
-            "query": shared.get("query", "")
-        }
+        return shared
 
-    def exec(self, data):
+    def exec(self, shared):
         # Priority 1: FAQ match
-        if data["has_faq"] and data["faq_match"]:
-            faq = data["faq_match"]
-            response = {
-                "answer": faq["answer"],
-                "category": faq.get("category", "general"),
-                "related": faq.get("related", []),
-                "url": faq.get("url"),
-                "source": "faq"
-            }
+        if shared.get("has_faq_match") and shared.get("faq_match"):
+            return faq_response(shared["faq_match"])
 
         # Priority 2: LLM response
-        elif data["has_llm"] and data["llm_response"]:
-            response = {
-                "answer": data["llm_response"],
-                "category": "ai_generated",
-                "related": [],
-                "source": data["llm_source"]
-            }
+        if shared.get("has_llm_response") and shared.get("llm_response"):
+            return llm_response(shared["llm_response"], shared["llm_source"])
 
         # Priority 3: Fallback
-        else:
-            response = {
-                "answer": f"I don't have specific information about '{data['query']}' in my knowledge base yet. Here are some things I can help with:\n\n" +
-                         "- **Five Domains of OLP**: Access to Nature, College & Green Careers, Networks, School Sustainability, Environmental & Climate Literacy\n" +
-                         "- **Programs**: MWEE, Green Schools, CTE pathways\n" +
-                         "- **Resources**: Funding, professional development, curriculum\n" +
-                         "- **Contact info**: How to reach Maryland OLP team\n\n" +
-                         "Try asking about one of these topics, or contact the OLP team directly:\n" +
-                         "olivia.wisner1@maryland.gov or stephanie.tuckfield1@maryland.gov",
-                "category": "fallback",
-                "related": ["five domains", "contact olp", "what is maryland olp"],
-                "source": "fallback"
-            }
-        return response
+        return fallback_response(shared.get("query", ""))
 
 
 class LLMNode(Node):
@@ -338,11 +418,37 @@ class LLMNode(Node):
         if data["has_faq"]:
             return None
 
+        # Reuse an earlier answer for the same question. Otherwise only one
+        # request (across workers) asks the LLM a given question; the rest
+        # wait for its answer
+        key = normalize_query(data["query"])
+        cached, leader = shared_state.get_or_acquire(key, SINGLE_FLIGHT_TIMEOUT)
+        if cached is None and not leader:
+            cached = shared_state.wait_for_answer(key, SINGLE_FLIGHT_TIMEOUT)
+
+        if cached:
+            if answer_store:
+                answer_store.record_hit(key)
+            return {"response": cached[0], "source": cached[1], "cached": True, "ms": 0.0}
+
         # Try to get LLM response
-        response, source = get_llm_response(data["query"])
-        return {"response": response, "source": source}
+        try:
+            start = time.perf_counter()
+            response, source = get_llm_response(data["query"])
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if response:
+                shared_state.put_answer(key, response, source)
+                if answer_store:
+                    answer_store.record_answer(key, response, source)
+        finally:
+            if leader:
+                shared_state.release(key)
+        return {"response": response, "source": source, "cached": False, "ms": elapsed_ms}
 
     def post(self, shared, result):
+        if result:
+            shared["llm_ms"] = result["ms"]
+            shared["llm_cached"] = result["cached"]
         if result and result["response"]:
             shared["llm_response"] = result["response"]
             shared["llm_source"] = result["source"]
@@ -374,20 +480,55 @@ class ChatFlow:
         # Step 3: Format response
         response = self.formatter_node.run(shared)
 
+        if query_log:
+            query_log.record(query, response.source, shared.get("llm_ms", 0.0), shared.get("llm_cached", False))
+
+        if profiler is not None:
+            profiler.tag("provider", response.source)
+            profiler.tag("llm_cached", shared.get("llm_cached", False))
+            profiler.tag("query", query[:80])
+
         return response
 
 
 # Initialize the chat flow
 chat_flow = ChatFlow()
 
+# Move startup objects (FAQ index etc.) out of the collector's reach so
+# forked workers don't dirty their copy-on-write pages during collections
+gc.freeze()
+
 
 # ============================================
 # API Routes
 # ============================================
 
+if profiler is not None:
+    @app.before_request
+    def start_profile():
+        profiler.start(f"{request.method} {request.path}")
+
+    @app.after_request
+    def finish_profile(response):
+        profiler.finish(response.status_code)
+        return response
+
+    @app.teardown_request
+    def discard_profile(error):
+        # Requests that raised never reach after_request
+        profiler.finish(500)
+
+
+def admin_authorized() -> bool:
+    # Constant-time comparison so response timing doesn't leak the token
+    supplied = request.headers.get("Authorization", "").encode()
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(supplied, f"Bearer {ADMIN_TOKEN}".encode())
+
+
 @app.route("/")
 def health():
     """Health check endpoint"""
+    metrics = shared_state.counters()
     return jsonify({
         "status": "healthy",
         "service": "Maryland OLP AI Chat",
@@ -396,44 +537,45 @@ def health():
         "ollama_model": OLLAMA_MODEL if LLM_MODE in ["ollama", "hybrid"] else None,
         "has_openrouter": bool(OPENROUTER_API_KEY),
         "has_anthropic": bool(ANTHROPIC_API_KEY),
-        "has_openai": bool(OPENAI_API_KEY)
+        "has_openai": bool(OPENAI_API_KEY),
+        "shared_state": shared_state.backend,
+        "metrics": metrics,
+        "corrected_faq_matches": metrics.get("corrected_matches", 0),
+        "llm_calls_avoided": metrics.get("corrected_matches", 0) if LLM_MODE != "faq" else 0,
+        "cached_answers": len(answer_cache),
+        "answer_store_dropped": answer_store.dropped if answer_store else 0
     })
 
 
 @app.route("/api/chat", methods=["POST"])
 def chat():
     """Main chat endpoint"""
-    data = request.get_json()
+    data = request.get_json(silent=True)
+    query = data.get("message") if isinstance(data, dict) else None
 
-    if not data or "message" not in data:
+    if not isinstance(query, str) or not query.strip():
         return jsonify({"error": "Message required"}), 400
 
-    query = data["message"]
+    if CHAT_RATE_LIMIT and not shared_state.allow(f"chat:{request.remote_addr}", CHAT_RATE_LIMIT / 60, CHAT_RATE_BURST):
+        return jsonify({"error": "Too many requests"}), 429
 
     # Run through PocketFlow chat
     response = chat_flow.run(query)
+    shared_state.incr(f"responses_{response.source}")
 
-    return jsonify(response)
+    return app.response_class(response.body, mimetype="application/json")
 
 
 @app.route("/api/domains", methods=["GET"])
 def get_domains():
     """Get the five domains of action"""
-    return jsonify({
-        "domains": FIVE_DOMAINS
-    })
+    return app.response_class(DOMAINS_JSON, mimetype="application/json")
 
 
 @app.route("/api/faq", methods=["GET"])
 def get_faq_list():
     """Get list of available FAQ topics"""
-    topics = []
-    for key, value in FAQ_INDEX.items():
-        topics.append({
-            "topic": key,
-            "category": value.get("category", "general")
-        })
-    return jsonify({"topics": topics})
+    return app.response_class(FAQ_TOPICS_JSON, mimetype="application/json")
 
 
 @app.route("/api/faq/<topic>", methods=["GET"])
@@ -442,12 +584,12 @@ def get_faq_topic(topic):
     topic_lower = topic.lower().replace("-", " ")
 
     if topic_lower in FAQ_INDEX:
-        return jsonify(FAQ_INDEX[topic_lower])
+        return app.response_class(faq_entry_json(FAQ_INDEX[topic_lower]), mimetype="application/json")
 
     # Try keyword search
     result = find_best_match(topic_lower)
     if result:
-        return jsonify(result)
+        return app.response_class(faq_entry_json(result), mimetype="application/json")
 
     return jsonify({"error": "Topic not found"}), 404
 
@@ -473,6 +615,30 @@ def suggest_topics():
     return jsonify({"suggestions": suggestions[:5]})
 
 
+@app.route("/api/admin/slow-requests", methods=["GET"])
+def slow_requests():
+    """Recent slow requests with per-node timing breakdown"""
+    if profiler is None or not admin_authorized():
+        return jsonify({"error": "Not found"}), 404
+    return jsonify({
+        "threshold_ms": profiler.threshold_ms,
+        "interval_ms": PROFILE_INTERVAL_MS,
+        "requests": profiler.summaries()
+    })
+
+
+@app.route("/api/admin/slow-requests/folded", methods=["GET"])
+@app.route("/api/admin/slow-requests/<int:request_id>/folded", methods=["GET"])
+def slow_request_stacks(request_id=None):
+    """Folded stacks (for flamegraph.pl / speedscope) of one or all slow requests"""
+    if profiler is None or not admin_authorized():
+        return jsonify({"error": "Not found"}), 404
+    folded = profiler.folded(request_id)
+    if folded is None:
+        return jsonify({"error": "Request not found"}), 404
+    return app.response_class(folded, mimetype="text/plain")
+
+
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
     app.run(host="0.0.0.0", port=port, debug=True)
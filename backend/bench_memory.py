@@ -0,0 +1,144 @@
+"""
+Memory benchmark for Maryland OLP AI Chat Backend
+Compares plain-dict FAQ entries with per-request dict responses (the old
+layout) against FAQEntry records with pre-encoded responses, on a FAQ
+scaled up to 10k entries. Each layout is handed to a fresh interpreter as a
+pickle so its index memory is measured in isolation.
+
+Usage:
+    python bench_memory.py [entries]
+"""
+
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REQUESTS = 2000
+
+
+def rss_kb() -> int:
+    """Resident set size of this process (Linux)"""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def scaled_faq(entries: int) -> dict:
+    """faq_data.FAQ_INDEX repeated with distinct keys and answers"""
+    from faq_data import FAQ_INDEX
+
+    base = list(FAQ_INDEX.items())
+    scaled = {}
+    for i in range(entries):
+        key, value = base[i % len(base)]
+        scaled[f"{key} {i}"] = {**value, "answer": f"{value['answer']} ({i})", "related": list(value["related"])}
+    return scaled
+
+
+def dict_faq_response(faq: dict) -> bytes:
+    response = {
+        "answer": faq["answer"],
+        "category": faq.get("category", "general"),
+        "related": faq.get("related", []),
+        "url": faq.get("url"),
+        "source": "faq"
+    }
+    return json.dumps(response).encode()
+
+
+def dict_fallback_response(query: str) -> bytes:
+    response = {
+        "answer": f"I don't have specific information about '{query}' in my knowledge base yet. Here are some things I can help with:\n\n" +
+                 "- **Five Domains of OLP**: Access to Nature, College & Green Careers, Networks, School Sustainability, Environmental & Climate Literacy\n" +
+                 "- **Programs**: MWEE, Green Schools, CTE pathways\n" +
+                 "- **Resources**: Funding, professional development, curriculum\n" +
+                 "- **Contact info**: How to reach Maryland OLP team\n\n" +
+                 "Try asking about one of these topics, or contact the OLP team directly:\n" +
+                 "olivia.wisner1@maryland.gov or stephanie.tuckfield1@maryland.gov",
+        "category": "fallback",
+        "related": ["five domains", "contact olp", "what is maryland olp"],
+        "source": "fallback"
+    }
+    return json.dumps(response).encode()
+
+
+def per_request(fn, args: list) -> tuple[float, float]:
+    """Mean peak traced bytes and mean microseconds per call"""
+    start = time.perf_counter()
+    for arg in args:
+        fn(arg)
+    elapsed_us = (time.perf_counter() - start) / len(args) * 1e6
+
+    tracemalloc.start()
+    peak_total = 0
+    for arg in args:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        fn(arg)
+        peak_total += tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    return peak_total / len(args), elapsed_us
+
+
+def build(layout: str, entries: int) -> dict:
+    data = scaled_faq(entries)
+    if layout == "dicts":
+        return data
+    from faq_index import FAQEntry
+    return {key: FAQEntry.from_dict(key, value) for key, value in data.items()}
+
+
+def measure(layout: str, path: str) -> dict:
+    if layout == "dicts":
+        faq_fn, fallback_fn = dict_faq_response, dict_fallback_response
+    else:
+        import faq_index  # noqa: F401  (so the import isn't counted as index memory)
+        from responses import fallback_response, faq_response
+        faq_fn, fallback_fn = faq_response, fallback_response
+
+    before = rss_kb()
+    with open(path, "rb") as f:
+        index = pickle.load(f)
+    index_kb = rss_kb() - before
+
+    entries_sample = [index[key] for key in list(index)[:REQUESTS]]
+    faq_bytes, faq_us = per_request(faq_fn, entries_sample)
+    fallback_bytes, fallback_us = per_request(fallback_fn, [f"question {i}" for i in range(REQUESTS)])
+    return {
+        "index_rss_kb": index_kb,
+        "faq_bytes": faq_bytes,
+        "faq_us": faq_us,
+        "fallback_bytes": fallback_bytes,
+        "fallback_us": fallback_us,
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--layout":
+        print(json.dumps(measure(sys.argv[2], sys.argv[3])))
+        sys.exit()
+
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    print(f"Memory benchmark ({entries} FAQ entries, {REQUESTS} requests per path)")
+    with tempfile.TemporaryDirectory() as tmp:
+        for layout in ("dicts", "records"):
+            path = os.path.join(tmp, f"{layout}.pkl")
+            with open(path, "wb") as f:
+                pickle.dump(build(layout, entries), f, protocol=pickle.HIGHEST_PROTOCOL)
+            output = subprocess.run(
+                [sys.executable, __file__, "--layout", layout, path],
+                cwd=BASE_DIR, capture_output=True, text=True, check=True
+            ).stdout
+            r = json.loads(output)
+            print(f"{layout:<8} index RSS {r['index_rss_kb'] / 1024:6.1f} MB   "
+                  f"pickle {os.path.getsize(path) / 1024 / 1024:5.1f} MB   "
+                  f"faq {r['faq_bytes'] / 1024:5.1f} KB/req {r['faq_us']:5.1f} us   "
+                  f"fallback {r['fallback_bytes'] / 1024:5.1f} KB/req {r['fallback_us']:5.1f} us")
@@ -0,0 +1,61 @@
+"""
+Startup benchmark for Maryland OLP AI Chat Backend
+Measures import time and time-to-first-request in fresh interpreters
+
+Usage:
+    python bench_startup.py [runs]
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Runs inside a fresh interpreter so nothing is cached between samples
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+client = app.app.test_client()
+client.post("/api/chat", json={"message": "What is MWEE?"})
+t2 = time.perf_counter()
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "first_request_ms": (t2 - t0) * 1000,
+    "requests_loaded": "requests" in sys.modules,
+    "dotenv_loaded": "dotenv" in sys.modules,
+}))
+"""
+
+
+def run_probe(env_overrides: dict) -> dict:
+    env = dict(os.environ, **env_overrides)
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def median(values: list) -> float:
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def bench(label: str, env_overrides: dict, runs: int) -> None:
+    samples = [run_probe(env_overrides) for _ in range(runs)]
+    print(f"{label:<28} import {median([s['import_ms'] for s in samples]):7.1f} ms   "
+          f"first request {median([s['first_request_ms'] for s in samples]):7.1f} ms   "
+          f"requests loaded: {samples[0]['requests_loaded']}   "
+          f"dotenv loaded: {samples[0]['dotenv_loaded']}")
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    print(f"Startup benchmark (median of {runs} runs)")
+    bench("faq", {"LLM_MODE": "faq"}, runs)
+    bench("hybrid", {"LLM_MODE": "hybrid"}, runs)
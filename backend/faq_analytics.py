@@ -0,0 +1,235 @@
+"""
+FAQ candidate analytics for Maryland OLP AI Chat
+Streams the query log, clusters near-duplicate questions that went to an LLM,
+ranks the clusters by LLM time and cost, and proposes FAQ entries in a review
+file. Entries marked "approved": true are loaded into the FAQ index by
+faq_index.py, moving that traffic onto the local FAQ path.
+
+Usage:
+    python faq_analytics.py [--log data/queries.jsonl] [--top 20]
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from collections import Counter, defaultdict
+
+from answer_store import normalize_query
+from faq_index import CANDIDATES_PATH, build_index, load_candidates
+from query_log import iter_query_log
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_LOG_PATH = os.environ.get("QUERY_LOG_PATH", os.path.join(BASE_DIR, "data", "queries.jsonl"))
+DEFAULT_STORE_PATH = os.environ.get("ANSWER_STORE_PATH", os.path.join(BASE_DIR, "data", "answers.db"))
+
+# Rough per-call cost estimates (USD) for ranking only
+PROVIDER_COST = {
+    "ollama": 0.0,
+    "llamacpp": 0.0,
+    "openrouter": 0.0001,
+    "anthropic": 0.001,
+    "openai": 0.0005,
+}
+
+LLM_SOURCES = set(PROVIDER_COST)
+
+STOPWORDS = {
+    "a", "an", "and", "are", "can", "do", "does", "for", "how", "i", "in", "is",
+    "it", "me", "my", "of", "on", "or", "the", "to", "what", "when", "where",
+    "which", "who", "why", "with", "you", "your", "about", "tell", "there", "we",
+}
+
+
+# Candidate keywords match whole words of the normalized query (see
+# faq_index.match_query); shorter words are mostly fragments and acronyms too
+# ambiguous to send a question to one FAQ entry
+MIN_KEYWORD_LENGTH = 4
+# Tokens found in more than this share of clusters are everyday words, not topics
+MAX_KEYWORD_SPREAD = 0.1
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in re.findall(r"[a-z0-9]+", text.lower()) if t not in STOPWORDS]
+
+
+class QueryClusterer:
+    """Single-pass leader clustering of queries by token overlap"""
+
+    def __init__(self, threshold: float = 0.6):
+        self.threshold = threshold
+        self.clusters = []
+        self.token_index = defaultdict(set)  # token -> cluster ids
+
+    def add(self, query: str, llm_ms: float = 0.0, cost: float = 0.0, provider: str = "") -> None:
+        key = normalize_query(query)
+        tokens = frozenset(tokenize(key))
+        if not tokens:
+            return
+
+        # Only compare against clusters sharing at least one token
+        best_id, best_score = None, 0.0
+        for cluster_id in set().union(*(self.token_index[t] for t in tokens)):
+            leader = self.clusters[cluster_id]["tokens"]
+            score = len(tokens & leader) / len(tokens | leader)
+            if score > best_score:
+                best_id, best_score = cluster_id, score
+
+        if best_id is None or best_score < self.threshold:
+            best_id = len(self.clusters)
+            self.clusters.append({
+                "tokens": tokens,
+                "queries": Counter(),
+                "providers": Counter(),
+                "count": 0,
+                "llm_ms": 0.0,
+                "cost": 0.0,
+            })
+            for token in tokens:
+                self.token_index[token].add(best_id)
+
+        cluster = self.clusters[best_id]
+        cluster["queries"][key] += 1
+        cluster["count"] += 1
+        cluster["llm_ms"] += llm_ms
+        cluster["cost"] += cost
+        if provider:
+            cluster["providers"][provider] += 1
+
+    def ranked(self) -> list[dict]:
+        """Clusters ordered by LLM time, then cost, then volume"""
+        return sorted(self.clusters, key=lambda c: (c["llm_ms"], c["cost"], c["count"]), reverse=True)
+
+
+def cluster_log(entries, threshold: float = 0.6) -> QueryClusterer:
+    """Cluster every LLM-answered query in a stream of log entries"""
+    clusterer = QueryClusterer(threshold)
+    for entry in entries:
+        source = entry.get("source", "")
+        if source not in LLM_SOURCES:
+            continue
+        cost = 0.0 if entry.get("cached") else PROVIDER_COST[source]
+        clusterer.add(entry.get("query", ""), entry.get("llm_ms", 0.0), cost, source)
+    return clusterer
+
+
+def lookup_answer(store_path: str, keys: list[str]) -> str:
+    """Most recent stored LLM answer for the first key that has one"""
+    if not os.path.exists(store_path):
+        return ""
+    conn = sqlite3.connect(f"file:{store_path}?mode=ro", uri=True)
+    try:
+        for key in keys:
+            row = conn.execute(
+                "SELECT answer FROM answers WHERE query = ? ORDER BY id DESC LIMIT 1", (key,)
+            ).fetchone()
+            if row:
+                return row[0]
+    except sqlite3.Error:
+        pass
+    finally:
+        conn.close()
+    return ""
+
+
+def propose_candidates(clusterer: QueryClusterer, faq_index: dict, keyword_map: dict,
+                       store_path: str, top: int = 20) -> list[dict]:
+    """Turn the top clusters into reviewable FAQ entries"""
+    spread = Counter(token for cluster in clusterer.clusters for token in cluster["tokens"])
+    everyday = {
+        token for token, clusters in spread.items()
+        if clusters > 1 and clusters > MAX_KEYWORD_SPREAD * len(clusterer.clusters)
+    }
+
+    candidates = []
+    for cluster in clusterer.ranked():
+        if len(candidates) >= top:
+            break
+        members = [q for q, _ in cluster["queries"].most_common()]
+        key = members[0].rstrip("?!. ")
+        if key in faq_index:
+            continue
+
+        token_counts = Counter()
+        for query, count in cluster["queries"].items():
+            for token in tokenize(query):
+                token_counts[token] += count
+        keywords = [
+            t for t, _ in token_counts.most_common()
+            if len(t) >= MIN_KEYWORD_LENGTH and not t.isdigit() and t not in everyday and t not in keyword_map
+        ][:3]
+
+        candidates.append({
+            "key": key,
+            "answer": lookup_answer(store_path, members),
+            "category": "candidate",
+            "related": [],
+            "keywords": keywords,
+            "approved": False,
+            "stats": {
+                "queries": cluster["count"],
+                "llm_ms": round(cluster["llm_ms"], 1),
+                "cost_usd": round(cluster["cost"], 6),
+                "providers": dict(cluster["providers"]),
+                "examples": members[:5],
+            },
+        })
+    return candidates
+
+
+def merge_review_file(path: str, candidates: list[dict]) -> list[dict]:
+    """Keep reviewer edits (answer, keywords, approval) for keys already proposed"""
+    existing = {c["key"]: c for c in load_candidates(path)}
+    merged = []
+    for candidate in candidates:
+        previous = existing.pop(candidate["key"], None)
+        if previous:
+            candidate = {**candidate, **{
+                field: previous[field]
+                for field in ("answer", "category", "related", "keywords", "approved")
+                if field in previous and (previous[field] or field == "approved")
+            }}
+        merged.append(candidate)
+    # Entries dropped from the top list stay in the file until a reviewer removes them
+    merged.extend(existing.values())
+    return merged
+
+
+def save_candidates(path: str, candidates: list[dict]) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"generated": round(time.time()), "candidates": candidates}, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Propose FAQ entries from frequent LLM questions")
+    parser.add_argument("--log", default=DEFAULT_LOG_PATH, help="query log path, or - for stdin")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help="answer store database")
+    parser.add_argument("--out", default=CANDIDATES_PATH, help="review file to write")
+    parser.add_argument("--top", type=int, default=20, help="number of clusters to propose")
+    parser.add_argument("--threshold", type=float, default=0.6, help="token overlap needed to join a cluster")
+    args = parser.parse_args()
+
+    index = build_index()
+
+    if args.log == "-":
+        entries = (json.loads(line) for line in sys.stdin if line.strip())
+    else:
+        entries = iter_query_log(args.log)
+
+    clusterer = cluster_log(entries, args.threshold)
+    candidates = propose_candidates(clusterer, index["faq_index"], index["keyword_map"], args.store, args.top)
+    save_candidates(args.out, merge_review_file(args.out, candidates))
+
+    print(f"{len(clusterer.clusters)} clusters, wrote {len(candidates)} candidates to {args.out}")
+    for candidate in candidates:
+        stats = candidate["stats"]
+        print(f"  {stats['llm_ms'] / 1000:8.1f}s  ${stats['cost_usd']:.4f}  {stats['queries']:5d}x  {candidate['key']}")
+
+
+if __name__ == "__main__":
+    main()
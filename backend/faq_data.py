@@ -290,28 +290,8 @@ KEYWORD_MAP = {
 
 def find_best_match(query: str) -> dict:
     """Find the best FAQ match for a user query"""
-    query_lower = query.lower().strip()
-
-    # Direct match
-    if query_lower in FAQ_INDEX:
-        return FAQ_INDEX[query_lower]
-
-    # Check for keyword matches
-    matched_faqs = []
-    for keyword, faq_keys in KEYWORD_MAP.items():
-        if keyword in query_lower:
-            matched_faqs.extend(faq_keys)
-
-    # Return most common match or first match
-    if matched_faqs:
-        # Count occurrences and return most relevant
-        from collections import Counter
-        counts = Counter(matched_faqs)
-        best_key = counts.most_common(1)[0][0]
-        return FAQ_INDEX[best_key]
-
-    # No match found
-    return None
+    from faq_index import match_query
+    return match_query(query, FAQ_INDEX, KEYWORD_MAP)
 
 
 def get_all_categories() -> list:
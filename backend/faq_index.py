@@ -0,0 +1,146 @@
+"""
+FAQ search index for Maryland OLP AI Chat
+Builds the FAQ records, keyword map, and query normalizer from faq_data.py
+(plus approved FAQ candidates) once at startup, and matches queries against them
+"""
+
+import json
+import os
+import sys
+from collections import Counter
+from dataclasses import dataclass
+
+from query_normalizer import QueryNormalizer
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CANDIDATES_PATH = os.environ.get("FAQ_CANDIDATES_PATH", os.path.join(BASE_DIR, "faq_candidates.json"))
+
+
+@dataclass(frozen=True, slots=True)
+class FAQEntry:
+    """Immutable FAQ record; the entry's JSON is encoded once when the index is built"""
+
+    key: str
+    category: str
+    fields: bytes  # '"answer": ..., "category": ..., "related": [...], "url": ...' without braces
+
+    @classmethod
+    def from_dict(cls, key: str, data: dict) -> "FAQEntry":
+        category = sys.intern(data.get("category", "general"))
+        encoded = json.dumps({
+            "answer": data["answer"],
+            "category": category,
+            "related": data.get("related", []),
+            "url": data.get("url")
+        })
+        return cls(sys.intern(key), category, encoded[1:-1].encode())
+
+    def to_dict(self) -> dict:
+        return json.loads(b"{" + self.fields + b"}")
+
+
+def load_candidates(path: str = CANDIDATES_PATH) -> list[dict]:
+    """Read the FAQ candidate review file (see faq_analytics.py)"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f).get("candidates", [])
+    except (OSError, ValueError, AttributeError):
+        return []
+
+
+def build_index() -> dict:
+    """Build the search index from faq_data.py plus approved FAQ candidates"""
+    from faq_data import FAQ_INDEX, FIVE_DOMAINS, KEYWORD_MAP
+
+    faq_index = {key: FAQEntry.from_dict(key, value) for key, value in FAQ_INDEX.items()}
+    keyword_map = {keyword: list(keys) for keyword, keys in KEYWORD_MAP.items()}
+
+    # Curated entries always win over generated ones
+    for candidate in load_candidates():
+        key = candidate.get("key")
+        if not candidate.get("approved") or not key or not candidate.get("answer") or key in faq_index:
+            continue
+        faq_index[key] = FAQEntry.from_dict(key, candidate)
+        for keyword in candidate.get("keywords", []):
+            keyword_map.setdefault(keyword, []).append(key)
+
+    # Share one string object per FAQ key between the index and keyword map
+    keyword_map = {
+        sys.intern(keyword): tuple(faq_index[key].key for key in keys)
+        for keyword, keys in keyword_map.items()
+    }
+
+    return {
+        "faq_index": faq_index,
+        "keyword_map": keyword_map,
+        "five_domains": FIVE_DOMAINS,
+        "normalizer": QueryNormalizer(faq_index, keyword_map),
+    }
+
+
+def matching_keywords(text: str, keyword_map: dict, keywords: dict | None = None) -> list[str]:
+    """Keywords found in text
+
+    Raw keywords match as substrings; with keywords (keyword -> normalized
+    form, see QueryNormalizer) the normalized forms must match whole words.
+    """
+    if keywords:
+        padded = f" {text} "
+        return [keyword for keyword in keyword_map if f" {keywords[keyword]} " in padded]
+    return [keyword for keyword in keyword_map if keyword in text]
+
+
+def best_match(matched: list[str], faq_index: dict, keyword_map: dict):
+    """Most frequently referenced FAQ among the matched keywords"""
+    matched_faqs = [key for keyword in matched for key in keyword_map[keyword]]
+
+    # Return most common match or first match
+    if matched_faqs:
+        counts = Counter(matched_faqs)
+        best_key = counts.most_common(1)[0][0]
+        return faq_index[best_key]
+    return None
+
+
+def keyword_match(text: str, faq_index: dict, keyword_map: dict, keywords: dict | None = None):
+    """Most frequently referenced FAQ among the keywords found in text"""
+    return best_match(matching_keywords(text, keyword_map, keywords), faq_index, keyword_map)
+
+
+def match_query(query: str, faq_index: dict, keyword_map: dict,
+                normalizer: QueryNormalizer | None = None, metrics=None):
+    """Find the best FAQ match for a user query
+
+    Returns whatever faq_index holds (FAQEntry for a built index, dict for
+    faq_data.FAQ_INDEX). metrics, if given, needs an incr(name) method
+    (see shared_state.py) and counts matches that needed spelling correction
+    """
+    query_lower = query.lower().strip()
+
+    # Direct match
+    if query_lower in faq_index:
+        return faq_index[query_lower]
+
+    # Check for keyword matches (unnormalized)
+    if not normalizer:
+        return keyword_match(query_lower, faq_index, keyword_map)
+
+    # Match on the folded, stemmed, spell-corrected query
+    normalized, corrected = normalizer.normalize_with_corrections(query)
+    normalized_key = normalizer.faq_keys.get(normalized)
+    if normalized_key:
+        result = faq_index[normalized_key]
+        matched_phrases = [normalized]
+    else:
+        matched = matching_keywords(normalized, keyword_map, normalizer.keywords)
+        result = best_match(matched, faq_index, keyword_map)
+        matched_phrases = [normalizer.keywords[keyword] for keyword in matched]
+
+    # Count matches where every matched key/keyword contains a corrected word
+    if result and corrected and metrics is not None and all(
+        corrected.intersection(phrase.split()) for phrase in matched_phrases
+    ):
+        metrics.incr("corrected_matches")
+
+    # None when nothing matched
+    return result
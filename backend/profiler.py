@@ -0,0 +1,137 @@
+"""
+Request profiler for Maryland OLP AI Chat
+Samples the stack of every in-flight request on a background thread and
+keeps the profile of requests slower than a threshold, with per-node
+timings and flame-graph-compatible folded stacks tagged by ChatFlow node
+and provider.
+
+Opt-in: nothing here runs unless PROFILE_SLOW_MS is set.
+"""
+
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+MAX_STACK_DEPTH = 64
+
+
+class RequestState:
+    """Profile data for one in-flight request"""
+
+    __slots__ = ("start", "label", "node", "tags", "timings", "samples")
+
+    def __init__(self, label: str):
+        self.start = time.perf_counter()
+        self.label = label
+        self.node = "request"
+        self.tags = {}
+        self.timings = Counter()  # node -> ms
+        self.samples = Counter()  # (node, folded stack) -> samples
+
+
+def fold_stack(frame) -> str:
+    """Root-first 'file:function;...' stack for flame graph tools"""
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class RequestProfiler:
+    """Sampling profiler that keeps only slow requests"""
+
+    def __init__(self, threshold_ms: float, interval_ms: float = 5, keep: int = 50):
+        self.threshold_ms = threshold_ms
+        self.interval = interval_ms / 1000
+        self.active = {}  # thread id -> RequestState
+        self.slow = deque(maxlen=keep)
+        self.ids = itertools.count(1)
+        self.wake = threading.Event()
+        self.thread = threading.Thread(target=self._sampler, name="request-profiler", daemon=True)
+        self.thread.start()
+
+    # ---------- Request hooks ----------
+
+    def start(self, label: str) -> None:
+        self.active[threading.get_ident()] = RequestState(label)
+        self.wake.set()
+
+    def current(self) -> RequestState | None:
+        return self.active.get(threading.get_ident())
+
+    def enter_node(self, name: str) -> None:
+        state = self.current()
+        if state:
+            state.node = name
+
+    def exit_node(self, name: str, elapsed_ms: float) -> None:
+        state = self.current()
+        if state:
+            state.timings[name] += elapsed_ms
+            state.node = "request"
+
+    def tag(self, key: str, value) -> None:
+        state = self.current()
+        if state:
+            state.tags[key] = value
+
+    def finish(self, status: int) -> None:
+        state = self.active.pop(threading.get_ident(), None)
+        if state is None:
+            return
+        total_ms = (time.perf_counter() - state.start) * 1000
+        if total_ms < self.threshold_ms:
+            return
+
+        provider = state.tags.get("provider", "none")
+        folded = [
+            f"{state.label};node:{node};provider:{provider};{stack} {count}"
+            for (node, stack), count in state.samples.most_common()
+        ]
+        self.slow.append({
+            "id": next(self.ids),
+            "ts": round(time.time(), 3),
+            "request": state.label,
+            "status": status,
+            "total_ms": round(total_ms, 1),
+            "nodes_ms": {node: round(ms, 1) for node, ms in state.timings.items()},
+            "tags": state.tags,
+            "samples": sum(state.samples.values()),
+            "folded": folded,
+        })
+
+    # ---------- Reporting ----------
+
+    def summaries(self) -> list[dict]:
+        """Recent slow requests, newest first, without the full stacks"""
+        return [
+            {**{k: v for k, v in record.items() if k != "folded"}, "top_stacks": record["folded"][:5]}
+            for record in reversed(self.slow)
+        ]
+
+    def folded(self, request_id: int | None = None) -> str | None:
+        """Folded stacks for one slow request, or all of them merged"""
+        records = [r for r in self.slow if request_id is None or r["id"] == request_id]
+        if request_id is not None and not records:
+            return None
+        return "\n".join(line for record in records for line in record["folded"]) + "\n"
+
+    # ---------- Sampler thread ----------
+
+    def _sampler(self):
+        while True:
+            if not self.active:
+                self.wake.wait()
+                self.wake.clear()
+                continue
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            for thread_id, state in list(self.active.items()):
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    state.samples[(state.node, fold_stack(frame))] += 1
@@ -0,0 +1,152 @@
+"""
+Query log for Maryland OLP AI Chat
+Appends one JSON line per chat request (query, source, LLM latency) for
+offline analytics. Lines are handed to a background listener thread so the
+request path never waits on disk, and the file is rotated at a size cap.
+
+Each worker process writes its own file (queries.<pid>.jsonl), because
+rotating a file shared between processes loses and splits lines.
+"""
+
+import glob
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import time
+
+
+class QueueDrainListener(logging.handlers.QueueListener):
+    """QueueListener whose stop() waits for room instead of raising queue.Full"""
+
+    stop_timeout = 5.0
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel, timeout=self.stop_timeout)
+
+
+def process_log_path(path: str, pid: int) -> str:
+    """queries.jsonl -> queries.<pid>.jsonl"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{pid}{ext}"
+
+
+class QueryLog:
+    """Non-blocking, size-capped JSON-lines writer built on logging's QueueHandler
+
+    Writes to this process's file, which rotates to .1 ... .<backups> once it
+    reaches max_bytes. On start, files left by processes that are no longer
+    running are deleted (oldest first) beyond one process's worth of history.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 50 * 1024 * 1024, backups: int = 5,
+                 queue_size: int = 10000):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        prune_query_logs(path, max_bytes * (backups + 1))
+        self.path = process_log_path(path, os.getpid())
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.closed = False
+
+        self.file_handler = logging.handlers.RotatingFileHandler(
+            self.path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8"
+        )
+        self.file_handler.setFormatter(logging.Formatter("%(message)s"))
+        self.listener = QueueDrainListener(self.queue, self.file_handler)
+        self.listener.start()
+
+    def record(self, query: str, source: str, llm_ms: float = 0.0, cached: bool = False) -> None:
+        line = json.dumps({
+            "ts": round(time.time(), 3),
+            "query": query,
+            "source": source,
+            "llm_ms": round(llm_ms, 1),
+            "cached": cached
+        })
+        record = logging.LogRecord("query_log", logging.INFO, __file__, 0, line, None, None)
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self) -> None:
+        """Write out queued lines and close the file"""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.listener.stop()
+        except queue.Full:
+            print(f"Query log: listener stuck, {self.queue.qsize()} lines not written")
+        self.file_handler.close()
+
+
+def log_pid(path: str, log_path: str) -> int | None:
+    """Process id in a per-process log name (None for the shared path.N files)"""
+    root, ext = os.path.splitext(path)
+    name = log_path[len(root) + 1:].split(".", 1)[0]
+    return int(name) if log_path.startswith(root + ".") and name.isdigit() else None
+
+
+def query_log_paths(path: str) -> list[str]:
+    """Every process's log and rotated backups that exist, oldest first"""
+    root, ext = os.path.splitext(path)
+    pattern = glob.escape(root) + ".*" + ext
+    paths = set(glob.glob(pattern) + glob.glob(pattern + ".*") + glob.glob(glob.escape(path) + ".*"))
+    if os.path.exists(path):
+        paths.add(path)
+
+    def age(log_path: str):
+        # Backups keep their mtime when renamed; higher numbers are older
+        suffix = log_path.rsplit(".", 1)[-1]
+        try:
+            mtime = os.path.getmtime(log_path)
+        except OSError:  # removed by another process meanwhile
+            mtime = 0.0
+        return mtime, -int(suffix) if suffix.isdigit() else 0
+
+    return sorted(paths, key=age)
+
+
+def prune_query_logs(path: str, max_total: int) -> None:
+    """Delete the oldest logs of finished processes until the total fits max_total"""
+    sizes = {}
+    for log_path in query_log_paths(path):
+        try:
+            sizes[log_path] = os.path.getsize(log_path)
+        except OSError:
+            continue
+    total = sum(sizes.values())
+    for log_path, size in sizes.items():
+        if total <= max_total:
+            break
+        pid = log_pid(path, log_path)
+        if pid is not None and process_running(pid):
+            continue
+        try:
+            os.remove(log_path)
+        except OSError:  # another worker pruned it first
+            pass
+        total -= size
+
+
+def process_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def iter_query_log(path: str):
+    """Stream entries from every process's query log, skipping malformed lines"""
+    for log_path in query_log_paths(path):
+        with open(log_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
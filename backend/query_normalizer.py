@@ -0,0 +1,171 @@
+"""
+Query normalization for Maryland OLP AI Chat
+Folds Unicode and punctuation, applies light stemming, and corrects spelling
+against the FAQ/keyword vocabulary with a SymSpell-style symmetric-delete
+index, so near-miss questions still hit the local FAQ instead of an LLM.
+
+All lookup tables are built once when the FAQ index is built, so
+normalizing a query is a few dictionary lookups.
+"""
+
+import re
+import unicodedata
+from collections import Counter
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Cap on remembered corrections so odd input can't grow memory without bound
+MAX_CACHED_CORRECTIONS = 10000
+
+def fold_text(text: str) -> str:
+    """Lowercase, strip accents, and turn punctuation into spaces"""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(WORD_RE.findall(text.lower()))
+
+
+def stem(word: str) -> str:
+    """Light suffix stripping (plurals, common verb endings, and -ment)"""
+    if len(word) <= 3 or word.isdigit():
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith("sses"):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+    if word.endswith("ing") and len(word) > 5:
+        word = word[:-3]
+    elif word.endswith("ed") and len(word) > 4:
+        word = word[:-2]
+    elif word.endswith("ment") and len(word) > 8:
+        word = word[:-4]
+    return word
+
+
+def max_edit_distance(word: str) -> int:
+    """Allow fewer edits for short words so acronyms don't collide
+
+    Words of three letters or fewer are never edited, only completed to a
+    keyword (see QueryNormalizer.completions)
+    """
+    if len(word) <= 3:
+        return 0
+    if len(word) <= 8:
+        return 1
+    return 2
+
+
+def plausible_correction(word: str, candidate: str) -> bool:
+    """Typo shapes accepted by the corrector
+
+    Corrections always keep the first letter. Short words may only be missing
+    a letter or have extra letters at the end ("scool" -> "school", "mweee" ->
+    "mwee"), so real words one substitution away from the vocabulary stay as
+    they are ("trail" is not "train", nor "rain").
+    """
+    if candidate[0] != word[0]:
+        return False
+    return len(word) > 5 or len(candidate) > len(word) or word.startswith(candidate)
+
+
+def deletes(word: str, distance: int) -> set[str]:
+    """All strings reachable from word by removing up to `distance` characters"""
+    results = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        results |= frontier
+    return results
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Damerau-Levenshtein distance (optimal string alignment)"""
+    prev_prev = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(prev[j] + 1, current[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], prev_prev[j - 2] + 1)
+        prev_prev, prev = prev, current
+    return prev[len(b)]
+
+
+class QueryNormalizer:
+    """Precomputed normalization and spelling tables for the FAQ vocabulary"""
+
+    def __init__(self, faq_keys, keywords):
+        self.vocabulary = Counter()
+        for phrase in list(faq_keys) + list(keywords):
+            for word in fold_text(phrase).split():
+                self.vocabulary[stem(word)] += 1
+
+        # Symmetric-delete index: delete variant -> vocabulary words
+        self.delete_index = {}
+        for word in self.vocabulary:
+            for variant in deletes(word, max_edit_distance(word)):
+                self.delete_index.setdefault(variant, []).append(word)
+
+        # Memo of misspellings seen at runtime (bounded)
+        self.corrections = {}
+
+        # Three-letter words may complete a four-letter keyword ("mwe" -> "mwee")
+        completions = {}
+        for keyword in keywords:
+            word = fold_text(keyword)
+            if len(word) == 4 and word.isalpha() and stem(word) == word:
+                completions.setdefault(word[:-1], set()).add(word)
+        self.completions = {prefix: words.pop() for prefix, words in completions.items() if len(words) == 1}
+
+        # Normalized forms of the FAQ keys and keywords, mapped back to originals
+        self.faq_keys = {self.normalize(key): key for key in faq_keys}
+        self.keywords = {keyword: self.normalize(keyword) for keyword in keywords}
+
+    def correct(self, word: str) -> str:
+        """Closest vocabulary word within the edit budget, or the word itself"""
+        if word in self.vocabulary:
+            return word
+        corrected = self.corrections.get(word)
+        if corrected is None:
+            corrected = self.lookup(word)
+            if len(self.corrections) < MAX_CACHED_CORRECTIONS:
+                self.corrections[word] = corrected
+        return corrected
+
+    def lookup(self, word: str) -> str:
+        """Symmetric-delete search for the closest vocabulary word"""
+        distance = max_edit_distance(word)
+        if not distance:
+            return self.completions.get(word, word)
+
+        candidates = set()
+        for variant in deletes(word, distance):
+            candidates.update(self.delete_index.get(variant, ()))
+
+        best, best_key = word, None
+        for candidate in candidates:
+            d = edit_distance(word, candidate)
+            if d > distance or not plausible_correction(word, candidate):
+                continue
+            key = (d, -self.vocabulary[candidate], candidate)
+            if best_key is None or key < best_key:
+                best, best_key = candidate, key
+        return best
+
+    def normalize(self, query: str) -> str:
+        """Folded, stemmed, spell-corrected form of a query"""
+        return " ".join(self.correct(stem(word)) for word in fold_text(query).split())
+
+    def normalize_with_corrections(self, query: str) -> tuple[str, set[str]]:
+        """normalize() plus the vocabulary words the spelling corrector substituted"""
+        words, corrected = [], set()
+        for word in fold_text(query).split():
+            stemmed = stem(word)
+            fixed = self.correct(stemmed)
+            if fixed != stemmed:
+                corrected.add(fixed)
+            words.append(fixed)
+        return " ".join(words), corrected
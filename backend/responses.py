@@ -0,0 +1,73 @@
+"""
+Pre-encoded chat responses for Maryland OLP AI Chat
+Response bodies are assembled by joining JSON fragments that are encoded
+once at import, instead of building and serializing a dict per request.
+"""
+
+import json
+from typing import NamedTuple
+
+FALLBACK_ANSWER = (
+    "I don't have specific information about '{query}' in my knowledge base yet. Here are some things I can help with:\n\n"
+    "- **Five Domains of OLP**: Access to Nature, College & Green Careers, Networks, School Sustainability, Environmental & Climate Literacy\n"
+    "- **Programs**: MWEE, Green Schools, CTE pathways\n"
+    "- **Resources**: Funding, professional development, curriculum\n"
+    "- **Contact info**: How to reach Maryland OLP team\n\n"
+    "Try asking about one of these topics, or contact the OLP team directly:\n"
+    "olivia.wisner1@maryland.gov or stephanie.tuckfield1@maryland.gov"
+)
+
+# Stand-in for the variable part of a template; encodes as "\u0000"
+PLACEHOLDER = "\x00"
+
+
+class ChatResponse(NamedTuple):
+    source: str
+    body: bytes  # encoded JSON
+
+
+def split_template(payload: dict) -> tuple[bytes, bytes]:
+    """Encode payload and split it around the placeholder"""
+    head, tail = json.dumps(payload).split(json.dumps(PLACEHOLDER)[1:-1])
+    return head.encode(), tail.encode()
+
+
+def escape(text: str) -> bytes:
+    """JSON string contents (no surrounding quotes)"""
+    return json.dumps(text)[1:-1].encode()
+
+
+OPEN = b"{"
+CLOSE = b"}"
+FAQ_TAIL = b', "source": "faq"}'
+
+FALLBACK_HEAD, FALLBACK_TAIL = split_template({
+    "answer": FALLBACK_ANSWER.format(query=PLACEHOLDER),
+    "category": "fallback",
+    "related": ["five domains", "contact olp", "what is maryland olp"],
+    "source": "fallback"
+})
+
+LLM_HEAD, _ = split_template({"answer": PLACEHOLDER})
+LLM_TAILS = {}  # source -> encoded tail
+
+
+def faq_response(entry) -> ChatResponse:
+    return ChatResponse("faq", b"".join((OPEN, entry.fields, FAQ_TAIL)))
+
+
+def llm_response(answer: str, source: str) -> ChatResponse:
+    tail = LLM_TAILS.get(source)
+    if tail is None:
+        _, tail = split_template({"answer": PLACEHOLDER, "category": "ai_generated", "related": [], "source": source})
+        LLM_TAILS[source] = tail
+    return ChatResponse(source, b"".join((LLM_HEAD, escape(answer), tail)))
+
+
+def fallback_response(query: str) -> ChatResponse:
+    return ChatResponse("fallback", b"".join((FALLBACK_HEAD, escape(query), FALLBACK_TAIL)))
+
+
+def faq_entry_json(entry) -> bytes:
+    """A FAQ entry on its own (the /api/faq/<topic> response)"""
+    return b"".join((OPEN, entry.fields, CLOSE))
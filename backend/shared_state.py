@@ -0,0 +1,337 @@
+"""
+Shared state for Maryland OLP AI Chat workers
+Answer cache, rate-limit buckets, single-flight locks, and metric counters.
+LocalState keeps them in-process; RedisState shares them across worker
+processes through a Redis-compatible server and falls back to LocalState
+whenever the server can't be reached.
+"""
+
+import json
+import threading
+import time
+import uuid
+from collections import Counter
+
+from answer_store import AnswerCache
+
+KEY_PREFIX = "olp:"
+
+# Token bucket in one round-trip: refill by elapsed time, then take a token
+TOKEN_BUCKET_SCRIPT = """
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + (now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return allowed
+"""
+
+# Only the lock owner may release it
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class LocalState:
+    """In-process state (one copy per worker)"""
+
+    backend = "local"
+
+    def __init__(self, answer_cache: AnswerCache):
+        self.answer_cache = answer_cache
+        self.lock = threading.Lock()
+        self.buckets = {}  # name -> (tokens, timestamp)
+        self.flights = {}  # key -> Event set when the leader finishes
+        self.metrics = Counter()
+
+    # ---------- Answer cache ----------
+
+    def get_answer(self, key: str) -> tuple[str, str] | None:
+        return self.answer_cache.get(key)
+
+    def put_answer(self, key: str, answer: str, provider: str) -> None:
+        self.answer_cache.put(key, answer, provider)
+
+    # ---------- Rate limiting ----------
+
+    def allow(self, name: str, rate: float, burst: int) -> bool:
+        """Token bucket: `rate` tokens per second, at most `burst` saved up"""
+        now = time.monotonic()
+        with self.lock:
+            tokens, ts = self.buckets.get(name, (burst, now))
+            tokens = min(burst, tokens + (now - ts) * rate)
+            allowed = tokens >= 1
+            self.buckets[name] = (tokens - 1 if allowed else tokens, now)
+            # Forget idle buckets (they'd be full again anyway)
+            if len(self.buckets) > 10000:
+                horizon = now - burst / rate
+                self.buckets = {k: v for k, v in self.buckets.items() if v[1] > horizon}
+        return allowed
+
+    # ---------- Single-flight ----------
+
+    def get_or_acquire(self, key: str, ttl: float) -> tuple[tuple[str, str] | None, bool]:
+        """Cached answer for `key`, else whether this caller should produce it"""
+        entry = self.get_answer(key)
+        if entry:
+            return entry, False
+        return None, self.acquire(key, ttl)
+
+    def acquire(self, key: str, ttl: float) -> bool:
+        """True if this caller should do the work for `key`"""
+        with self.lock:
+            if key in self.flights:
+                return False
+            self.flights[key] = threading.Event()
+            return True
+
+    def release(self, key: str) -> None:
+        with self.lock:
+            event = self.flights.pop(key, None)
+        if event:
+            event.set()
+
+    def wait_for_answer(self, key: str, timeout: float) -> tuple[str, str] | None:
+        """Wait for the leader working on `key`, then read its answer"""
+        with self.lock:
+            event = self.flights.get(key)
+        if event:
+            event.wait(timeout)
+        return self.get_answer(key)
+
+    # ---------- Metrics ----------
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self.lock:
+            self.metrics[name] += amount
+
+    def counters(self) -> dict:
+        with self.lock:
+            return dict(self.metrics)
+
+    def flush(self) -> None:
+        """Nothing is buffered in-process"""
+
+
+class RedisState:
+    """State shared through Redis, with LocalState as the fallback"""
+
+    def __init__(self, client, local: LocalState, answer_ttl: int = 7 * 24 * 3600,
+                 flush_interval: float = 1.0, retry_interval: float = 30.0):
+        self.client = client
+        self.local = local
+        self.answer_ttl = answer_ttl
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self.down_until = 0.0
+        self.owners = {}  # lock key -> token we hold
+        self.pending = Counter()  # metric increments not yet sent
+        self.last_flush = time.monotonic()
+        self.flush_lock = threading.Lock()
+        self.token_bucket = client.register_script(TOKEN_BUCKET_SCRIPT)
+        self.release_lock = client.register_script(RELEASE_SCRIPT)
+
+        import redis
+        self.errors = (redis.RedisError, OSError)
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    @property
+    def backend(self) -> str:
+        return "redis" if self.available else "local (redis unavailable)"
+
+    def _failed(self, e: Exception) -> None:
+        if self.available:
+            print(f"Shared state unavailable, using in-process state: {e}")
+        self.down_until = time.monotonic() + self.retry_interval
+
+    # ---------- Answer cache ----------
+
+    def get_answer(self, key: str) -> tuple[str, str] | None:
+        # Local copy first; it is a subset of what Redis holds
+        entry = self.local.get_answer(key)
+        if entry or not self.available:
+            return entry
+        try:
+            value = self.client.get(KEY_PREFIX + "answer:" + key)
+        except self.errors as e:
+            self._failed(e)
+            return None
+        if value is None:
+            return None
+        return self._cache_answer(key, value)
+
+    def _cache_answer(self, key: str, value: bytes) -> tuple[str, str]:
+        """Decode an answer read from Redis and keep a local copy"""
+        answer, provider = json.loads(value)
+        self.local.put_answer(key, answer, provider)
+        return answer, provider
+
+    def put_answer(self, key: str, answer: str, provider: str) -> None:
+        self.local.put_answer(key, answer, provider)
+        if not self.available:
+            return
+        try:
+            self.client.set(KEY_PREFIX + "answer:" + key, json.dumps([answer, provider]), ex=self.answer_ttl)
+        except self.errors as e:
+            self._failed(e)
+
+    # ---------- Rate limiting ----------
+
+    def allow(self, name: str, rate: float, burst: int) -> bool:
+        if self.available:
+            try:
+                return bool(self.token_bucket(keys=[KEY_PREFIX + "bucket:" + name], args=[rate, burst, time.time()]))
+            except self.errors as e:
+                self._failed(e)
+        return self.local.allow(name, rate, burst)
+
+    # ---------- Single-flight ----------
+
+    def get_or_acquire(self, key: str, ttl: float) -> tuple[tuple[str, str] | None, bool]:
+        """Answer lookup and lock attempt in one pipelined round-trip"""
+        entry = self.local.get_answer(key)
+        if entry:
+            return entry, False
+        if not self.available:
+            return self.local.get_or_acquire(key, ttl)
+        token = uuid.uuid4().hex
+        lock_key = KEY_PREFIX + "lock:" + key
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.get(KEY_PREFIX + "answer:" + key)
+            pipe.set(lock_key, token, nx=True, px=int(ttl * 1000))
+            value, locked = pipe.execute()
+            if value is not None:
+                # Already answered; give back a lock we didn't need
+                if locked:
+                    self.release_lock(keys=[lock_key], args=[token])
+                return self._cache_answer(key, value), False
+        except self.errors as e:
+            self._failed(e)
+            return self.local.get_or_acquire(key, ttl)
+        if locked:
+            self.owners[key] = token
+        return None, bool(locked)
+
+    def acquire(self, key: str, ttl: float) -> bool:
+        if self.available:
+            token = uuid.uuid4().hex
+            try:
+                if self.client.set(KEY_PREFIX + "lock:" + key, token, nx=True, px=int(ttl * 1000)):
+                    self.owners[key] = token
+                    return True
+                return False
+            except self.errors as e:
+                self._failed(e)
+        return self.local.acquire(key, ttl)
+
+    def release(self, key: str) -> None:
+        token = self.owners.pop(key, None)
+        if token is None:
+            self.local.release(key)
+            return
+        try:
+            self.release_lock(keys=[KEY_PREFIX + "lock:" + key], args=[token])
+        except self.errors as e:
+            self._failed(e)
+
+    def wait_for_answer(self, key: str, timeout: float) -> tuple[str, str] | None:
+        """Poll for the answer another worker is producing"""
+        if not self.available:
+            return self.local.wait_for_answer(key, timeout)
+        deadline = time.monotonic() + timeout
+        delay = 0.05
+        while time.monotonic() < deadline:
+            entry = self.local.get_answer(key)
+            if entry:
+                return entry
+            try:
+                # Lock check first: the leader stores its answer before releasing
+                pipe = self.client.pipeline(transaction=False)
+                pipe.exists(KEY_PREFIX + "lock:" + key)
+                pipe.get(KEY_PREFIX + "answer:" + key)
+                locked, value = pipe.execute()
+            except self.errors as e:
+                self._failed(e)
+                return None
+            if value is not None:
+                return self._cache_answer(key, value)
+            if not locked:
+                # Leader finished (or gave up) without an answer
+                return None
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+        return None
+
+    # ---------- Metrics ----------
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        """Buffer increments and send them in one pipeline per flush interval"""
+        with self.flush_lock:
+            self.pending[name] += amount
+            due = time.monotonic() - self.last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        with self.flush_lock:
+            pending, self.pending = self.pending, Counter()
+            self.last_flush = time.monotonic()
+        if not pending:
+            return
+        if self.available:
+            try:
+                pipe = self.client.pipeline(transaction=False)
+                for name, amount in pending.items():
+                    pipe.hincrby(KEY_PREFIX + "metrics", name, amount)
+                pipe.execute()
+                return
+            except self.errors as e:
+                self._failed(e)
+        for name, amount in pending.items():
+            self.local.incr(name, amount)
+
+    def counters(self) -> dict:
+        self.flush()
+        if self.available:
+            try:
+                values = self.client.hgetall(KEY_PREFIX + "metrics")
+                return {name.decode(): int(value) for name, value in values.items()}
+            except self.errors as e:
+                self._failed(e)
+        return self.local.counters()
+
+
+def create_state(url: str, answer_cache: AnswerCache) -> LocalState | RedisState:
+    """Connect to the shared backend at `url`, or fall back to in-process state"""
+    local = LocalState(answer_cache)
+    if not url:
+        return local
+    try:
+        import redis
+    except ImportError:
+        print("Shared state disabled: the redis package is not installed")
+        return local
+    pool = redis.ConnectionPool.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+    state = RedisState(redis.Redis(connection_pool=pool), local)
+    try:
+        state.client.ping()
+    except state.errors as e:
+        # Start in-process; calls retry the server after the retry interval
+        state._failed(e)
+    return state
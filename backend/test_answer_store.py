@@ -0,0 +1,85 @@
+"""Tests for answer_store.py"""
+
+import sqlite3
+import time
+
+from answer_store import STORE_SIZE, AnswerCache, AnswerStore, normalize_query
+
+
+def test_normalize_query():
+    assert normalize_query("  What IS\tMWEE? ") == "what is mwee?"
+
+
+def test_cache_evicts_least_recently_used():
+    cache = AnswerCache(max_entries=2)
+    cache.put("a", "A", "ollama")
+    cache.put("b", "B", "ollama")
+    cache.get("a")
+    cache.put("c", "C", "ollama")
+    assert cache.get("b") is None
+    assert cache.get("a") == ("A", "ollama")
+    assert len(cache) == 2
+
+
+def test_answers_survive_restart(tmp_path):
+    path = str(tmp_path / "answers.db")
+    store = AnswerStore(path)
+    store.record_answer("what is mwee", "An answer.", "ollama")
+    store.record_answer("what is mwee", "A newer answer.", "claude")
+    store.record_hit("what is mwee")
+    store.close()
+
+    cache = AnswerCache()
+    store = AnswerStore(path)
+    assert store.warm(cache) == 1
+    assert store.load()[0]["hits"] == 3
+    store.close()
+    assert cache.get("what is mwee") == ("A newer answer.", "claude")
+
+
+def test_limits_are_enforced_after_each_batch(tmp_path):
+    path = str(tmp_path / "answers.db")
+    store = AnswerStore(path, max_rows=5, max_bytes=50)
+    for i in range(10):
+        store.record_answer(f"question {i}", "answer", "ollama")
+    store.close()
+
+    conn = sqlite3.connect(path)
+    rows, total = conn.execute(STORE_SIZE).fetchone()
+    latest = conn.execute("SELECT query FROM answers ORDER BY id DESC LIMIT 1").fetchone()[0]
+    conn.close()
+    assert rows <= 5
+    assert total <= 50
+    assert latest == "question 9"
+
+
+def test_store_at_cap_is_not_compacted_on_every_write(tmp_path):
+    store = AnswerStore(str(tmp_path / "answers.db"), max_rows=100)
+    for i in range(100):
+        store.record_answer(f"fill {i}", "answer", "ollama")
+    wait_until_written(store, 100)
+    compactions = store.compactions
+
+    # One write per batch
+    for i in range(50):
+        store.record_answer(f"question {i}", "answer", "ollama")
+        wait_until_written(store, 101 + i)
+    store.close()
+
+    # Each compaction frees 10% of the cap, so 50 writes compact at most 5 times
+    assert store.compactions - compactions <= 5
+    assert store.rows <= 100
+
+
+def wait_until_written(store: AnswerStore, count: int) -> None:
+    deadline = time.monotonic() + 5
+    while store.written < count and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    store = AnswerStore(str(tmp_path / "answers.db"), queue_size=1)
+    store.close()  # nothing drains the queue from here on
+    assert store.record_hit("q") is True
+    assert store.record_answer("q", "answer", "ollama") is False
+    assert store.dropped == 1
@@ -0,0 +1,71 @@
+"""Tests for app.py routes (FAQ-only mode, profiling on)"""
+
+import os
+
+os.environ.update({"LLM_MODE": "faq", "PROFILE_SLOW_MS": "0.001", "ADMIN_TOKEN": "s3cret"})
+
+import json  # noqa: E402
+
+import pytest  # noqa: E402
+
+import app  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    return app.app.test_client()
+
+
+def test_chat_answers_from_faq(client):
+    response = client.post("/api/chat", json={"message": "What is MWEE?"})
+    assert response.status_code == 200
+    assert response.get_json()["source"] == "faq"
+
+
+@pytest.mark.parametrize("payload", [{}, {"message": None}, {"message": "  "}, {"message": 42}, ["hi"]])
+def test_chat_rejects_missing_or_non_string_messages(client, payload):
+    assert client.post("/api/chat", json=payload).status_code == 400
+
+
+def test_chat_rejects_non_json_body(client):
+    assert client.post("/api/chat", data="hello").status_code == 400
+
+
+def test_provider_chain_falls_through_in_order(monkeypatch):
+    monkeypatch.setattr(app, "LLM_MODE", "hybrid")
+    calls = []
+    for provider in app.PROVIDER_CHAINS["hybrid"]:
+        monkeypatch.setitem(app.PROVIDER_CALLS, provider,
+                            lambda query, p=provider: calls.append(p) or ("From OpenAI." if p == "openai" else None))
+    assert app.get_llm_response("q") == ("From OpenAI.", "openai")
+    assert calls == ["ollama", "llamacpp", "openrouter", "anthropic", "openai"]
+
+
+def test_single_flight_lock_covers_the_whole_chain():
+    assert app.chain_timeout("hybrid") == 210
+    assert app.chain_timeout("api") == 90
+    assert app.chain_timeout("faq") == 0
+
+
+def test_corrected_matches_count_only_on_chat(client):
+    before = client.get("/").get_json()["corrected_faq_matches"]
+    assert client.get("/api/faq/mweee").status_code == 200
+    assert client.get("/").get_json()["corrected_faq_matches"] == before
+    client.post("/api/chat", json={"message": "mweee"})
+    app.shared_state.flush()
+    assert client.get("/").get_json()["corrected_faq_matches"] == before + 1
+
+
+@pytest.mark.parametrize("header", [None, "Bearer wrong", "Bearer s3cret ", "s3cret", "Bearer sécret"])
+def test_admin_endpoints_require_the_token(client, header):
+    headers = {"Authorization": header} if header else {}
+    assert client.get("/api/admin/slow-requests", headers=headers).status_code == 404
+
+
+def test_admin_slow_requests(client):
+    client.post("/api/chat", json={"message": "What is MWEE?"})
+    headers = {"Authorization": "Bearer s3cret"}
+    response = client.get("/api/admin/slow-requests", headers=headers)
+    assert response.status_code == 200
+    assert any(r["request"] == "POST /api/chat" for r in json.loads(response.data)["requests"])
+    assert client.get("/api/admin/slow-requests/folded", headers=headers).status_code == 200
@@ -0,0 +1,48 @@
+"""Tests for faq_analytics.py"""
+
+from faq_analytics import cluster_log, merge_review_file, propose_candidates, save_candidates
+
+
+def log_entries(query: str, times: int, source: str = "ollama", llm_ms: float = 1000.0):
+    return [{"query": query, "source": source, "llm_ms": llm_ms, "cached": False}] * times
+
+
+def test_near_duplicates_share_a_cluster():
+    entries = (
+        log_entries("How do I start a school garden?", 3)
+        + log_entries("how do i start a school garden", 2)
+        + log_entries("What is MWEE?", 1, source="faq")
+        + log_entries("Best native plants for a rain garden", 1, source="anthropic")
+    )
+    clusterer = cluster_log(entries)
+    ranked = clusterer.ranked()
+    assert len(ranked) == 2
+    assert ranked[0]["count"] == 5
+    assert ranked[1]["cost"] > 0
+
+
+def test_candidate_keywords_skip_short_and_everyday_words(tmp_path):
+    entries = log_entries("Who won the school garden award this year?", 4)
+    for topic in ("bird count", "tree planting day", "stream cleanup"):
+        entries += log_entries(f"When is the {topic} this year?", 1, llm_ms=10.0)
+    clusterer = cluster_log(entries)
+    candidates = propose_candidates(clusterer, {}, {"school": ()}, str(tmp_path / "none.db"))
+
+    assert candidates[0]["key"] == "who won the school garden award this year"
+    assert candidates[0]["keywords"] == ["garden", "award"]
+    assert candidates[0]["answer"] == ""
+
+
+def test_review_edits_survive_rerun(tmp_path):
+    path = str(tmp_path / "faq_candidates.json")
+    save_candidates(path, [
+        {"key": "rain gardens", "answer": "Edited.", "keywords": ["rain garden"], "approved": True},
+        {"key": "old question", "answer": "", "keywords": [], "approved": False},
+    ])
+    merged = merge_review_file(path, [
+        {"key": "rain gardens", "answer": "Fresh LLM answer.", "keywords": ["rain"], "approved": False},
+    ])
+    assert merged[0]["answer"] == "Edited."
+    assert merged[0]["keywords"] == ["rain garden"]
+    assert merged[0]["approved"] is True
+    assert merged[1]["key"] == "old question"
@@ -0,0 +1,51 @@
+"""Tests for faq_index.py"""
+
+import json
+import pickle
+
+import faq_index
+from faq_index import FAQEntry, build_index, match_query
+
+
+def test_entry_round_trip():
+    data = {"answer": 'Say "hi" — ok', "category": "programs", "related": ["a"], "url": None}
+    entry = FAQEntry.from_dict("greeting", data)
+    assert entry.to_dict() == data
+    assert entry.key == "greeting"
+    assert entry.category == "programs"
+
+
+def test_entry_pickles_by_module_name():
+    entry = FAQEntry.from_dict("key", {"answer": "a"})
+    assert b"faq_index" in pickle.dumps(entry)
+    assert pickle.loads(pickle.dumps(entry)) == entry
+
+
+def test_build_index_shares_keys():
+    index = build_index()
+    for keys in index["keyword_map"].values():
+        for key in keys:
+            assert key is index["faq_index"][key].key
+
+
+def test_approved_candidates_are_merged(tmp_path, monkeypatch):
+    path = tmp_path / "candidates.json"
+    path.write_text(json.dumps({"candidates": [
+        {"key": "what is a rain garden", "answer": "A garden.", "keywords": ["rain garden"], "approved": True},
+        {"key": "what is a bioswale", "answer": "A swale.", "keywords": ["bioswale"], "approved": False},
+        {"key": "what is mwee", "answer": "Overridden?", "approved": True},
+    ]}))
+    monkeypatch.setattr(faq_index.load_candidates, "__defaults__", (str(path),))
+
+    index = build_index()
+    assert index["faq_index"]["what is a rain garden"].to_dict()["answer"] == "A garden."
+    assert "what is a bioswale" not in index["faq_index"]
+    assert index["faq_index"]["what is mwee"].to_dict()["answer"] != "Overridden?"
+
+
+def test_match_query():
+    index = build_index()
+    args = (index["faq_index"], index["keyword_map"], index["normalizer"])
+    assert match_query("What is MWEE?", *args).key in ("what is mwee", "mwee requirements")
+    assert match_query("what is maryland olp", *args).key == "what is maryland olp"
+    assert match_query("tell me a joke about penguins", *args) is None
@@ -0,0 +1,59 @@
+"""Tests for profiler.py"""
+
+import time
+
+from profiler import RequestProfiler, fold_stack
+
+
+def handle(profiler: RequestProfiler, seconds: float) -> None:
+    profiler.start("POST /api/chat")
+    profiler.enter_node("LLMNode")
+    time.sleep(seconds)
+    profiler.exit_node("LLMNode", seconds * 1000)
+    profiler.tag("provider", "ollama")
+    profiler.finish(200)
+
+
+def test_only_slow_requests_are_kept():
+    profiler = RequestProfiler(threshold_ms=50, interval_ms=1)
+    handle(profiler, 0.0)
+    handle(profiler, 0.08)
+
+    [summary] = profiler.summaries()
+    assert summary["id"] == 1
+    assert summary["status"] == 200
+    assert summary["total_ms"] >= 50
+    assert summary["nodes_ms"] == {"LLMNode": 80.0}
+    assert summary["tags"] == {"provider": "ollama"}
+    assert summary["samples"] > 0
+    assert profiler.active == {}
+
+
+def test_folded_stacks_are_tagged_by_node_and_provider():
+    profiler = RequestProfiler(threshold_ms=10, interval_ms=1)
+    handle(profiler, 0.03)
+
+    lines = profiler.folded(1).splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert stack.startswith("POST /api/chat;node:LLMNode;provider:ollama;")
+        assert "test_profiler.py:handle" in stack
+        assert int(count) > 0
+    assert profiler.folded() == profiler.folded(1)
+    assert profiler.folded(99) is None
+
+
+def test_keeps_only_the_latest_requests():
+    profiler = RequestProfiler(threshold_ms=0, keep=2)
+    for _ in range(3):
+        handle(profiler, 0.0)
+    assert [s["id"] for s in profiler.summaries()] == [3, 2]
+
+
+def test_fold_stack_is_root_first():
+    def inner():
+        import sys
+        return fold_stack(sys._getframe())
+
+    assert inner().endswith("test_profiler.py:test_fold_stack_is_root_first;test_profiler.py:inner")
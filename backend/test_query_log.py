@@ -0,0 +1,94 @@
+"""Tests for query_log.py"""
+
+import json
+import os
+import threading
+import time
+
+from query_log import QueryLog, iter_query_log, process_log_path, query_log_paths
+
+
+def test_records_are_written_on_close(tmp_path):
+    path = str(tmp_path / "queries.jsonl")
+    log = QueryLog(path)
+    log.record("What is MWEE?", "ollama", 812.34, cached=False)
+    log.record("what is mwee", "ollama", cached=True)
+    log.close()
+    log.close()  # atexit may call it again
+
+    entries = list(iter_query_log(path))
+    assert [e["query"] for e in entries] == ["What is MWEE?", "what is mwee"]
+    assert entries[0]["llm_ms"] == 812.3
+    assert entries[1]["cached"] is True
+
+
+def test_log_rotates_and_reads_oldest_first(tmp_path):
+    path = str(tmp_path / "queries.jsonl")
+    log = QueryLog(path, max_bytes=200, backups=3)
+    for i in range(20):
+        log.record(f"question {i}", "ollama")
+    log.close()
+
+    paths = query_log_paths(path)
+    assert paths[-1] == log.path == process_log_path(path, os.getpid())
+    assert len(paths) == 4
+    assert all(len(open(p, "rb").read()) <= 200 for p in paths)
+    queries = [e["query"] for e in iter_query_log(path)]
+    assert queries == sorted(queries, key=lambda q: int(q.split()[1]))
+    assert queries[-1] == "question 19"
+
+
+def test_close_waits_when_queue_is_full(tmp_path):
+    path = str(tmp_path / "queries.jsonl")
+    log = QueryLog(path, queue_size=5)
+    log.file_handler.acquire()  # stall the listener so the queue fills
+    for i in range(20):
+        log.record(f"question {i}", "ollama")
+    assert log.queue.full()
+
+    closer = threading.Thread(target=log.close)
+    closer.start()
+    time.sleep(0.05)
+    assert closer.is_alive()  # waiting for room, not raising queue.Full
+    log.file_handler.release()
+    closer.join(5)
+
+    assert not closer.is_alive()
+    assert log.file_handler.stream is None
+    assert len(list(iter_query_log(path))) == 20 - log.dropped
+
+
+def test_each_process_writes_its_own_file(tmp_path):
+    path = str(tmp_path / "queries.jsonl")
+    (tmp_path / "queries.jsonl").write_text(json.dumps({"query": "single-file era"}) + "\n")
+    other = tmp_path / "queries.999999999.jsonl"
+    other.write_text(json.dumps({"query": "other worker"}) + "\n")
+    os.utime(other, (1, 1))
+
+    log = QueryLog(path)
+    log.record("this worker", "ollama")
+    log.close()
+
+    assert log.path == str(tmp_path / f"queries.{os.getpid()}.jsonl")
+    assert [e["query"] for e in iter_query_log(path)] == ["other worker", "single-file era", "this worker"]
+
+
+def test_logs_of_finished_processes_are_pruned(tmp_path):
+    path = str(tmp_path / "queries.jsonl")
+    for age, pid in enumerate((999999997, 999999998, os.getppid())):
+        old = tmp_path / f"queries.{pid}.jsonl"
+        old.write_text("x" * 100 + "\n")
+        os.utime(old, (age + 1, age + 1))
+
+    QueryLog(path, max_bytes=60, backups=1).close()  # keeps about 120 bytes of old logs
+
+    assert not (tmp_path / "queries.999999997.jsonl").exists()
+    assert not (tmp_path / "queries.999999998.jsonl").exists()
+    assert (tmp_path / f"queries.{os.getppid()}.jsonl").exists()  # still running
+
+
+def test_malformed_lines_are_skipped(tmp_path):
+    path = tmp_path / "queries.jsonl"
+    path.write_text(json.dumps({"query": "ok"}) + "\n{truncated\n")
+    assert list(iter_query_log(str(path))) == [{"query": "ok"}]
+    assert list(iter_query_log(str(tmp_path / "missing.jsonl"))) == []
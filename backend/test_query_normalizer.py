@@ -0,0 +1,92 @@
+"""Tests for query_normalizer.py and normalized matching in faq_index.py"""
+
+from collections import Counter
+
+import pytest
+
+from faq_index import build_index, match_query
+from query_normalizer import edit_distance, fold_text, stem
+
+INDEX = build_index()
+NORMALIZER = INDEX["normalizer"]
+
+
+class Metrics:
+    def __init__(self):
+        self.counts = Counter()
+
+    def incr(self, name: str) -> None:
+        self.counts[name] += 1
+
+
+def match(query: str, metrics=None):
+    result = match_query(query, INDEX["faq_index"], INDEX["keyword_map"], NORMALIZER, metrics)
+    return result.key if result else None
+
+
+def test_fold_and_stem():
+    assert fold_text("  Énvironmental   LITERACY?! ") == "environmental literacy"
+    assert stem("schools") == "school"
+    assert stem("requirements") == "require"
+    assert stem("watersheds") == stem("watershed")
+    assert stem("bus") == "bus"
+
+
+def test_edit_distance_counts_transpositions():
+    assert edit_distance("mwee", "mwee") == 0
+    assert edit_distance("mwee", "mewe") == 1
+    assert edit_distance("literacy", "litaracy") == 1
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("mweee", "what is mwee"),
+    ("enviromental literacy", "what is environmental literacy"),
+    ("What is MWEE?", "what is mwee"),
+    ("MWE", "what is mwee"),
+    ("what is a MWE?", "what is mwee"),
+    ("green scools", "what are green schools"),
+    ("what are mwee requirements", "mwee requirements"),
+])
+def test_near_misses_match(query, expected):
+    assert match(query) == expected
+
+
+@pytest.mark.parametrize("query", [
+    "how do I buy a car",  # "buy" is not a typo for "bay"
+    "how old is the universe",  # nor "old" for "olp"
+    "where can I find a map",  # nor "find" for "fund"
+    "what is the weather today",
+    "How do I plant a rain garden",  # "rain" is not a typo for "train"
+    "is it going to rain",
+    "best trail near me",  # nor "trail"
+])
+def test_everyday_questions_do_not_match(query):
+    assert match(query) is None
+
+
+def test_only_plausible_typos_are_corrected():
+    assert NORMALIZER.correct("buy") == "buy"  # three letters: never edited
+    assert NORMALIZER.correct("mwe") == "mwee"  # ...only completed to a keyword
+    assert NORMALIZER.correct("fun") == "fun"  # "fund" is a stem, not a keyword
+    assert NORMALIZER.correct("find") == "find"  # substitution in a short word
+    assert NORMALIZER.correct("rain") == "rain"  # first letter changed
+    assert NORMALIZER.correct("trail") == "trail"
+    assert NORMALIZER.correct("mweee") == "mwee"
+    assert NORMALIZER.correct("scool") == "school"
+
+
+def test_keywords_match_whole_words():
+    # "green" is a keyword; "greenhouse" must not trigger it
+    assert match("how do I heat a greenhouse") is None
+
+
+def test_only_corrected_matches_are_counted():
+    metrics = Metrics()
+    match("What is MWEE?", metrics)
+    match("how do I buy a car", metrics)
+    match("How do I plant a rain garden", metrics)
+    match("what are watersheds", metrics)
+    assert metrics.counts["corrected_matches"] == 0
+    match("mweee", metrics)
+    match("enviromental literacy", metrics)
+    assert metrics.counts["corrected_matches"] == 2
@@ -0,0 +1,43 @@
+"""Tests for responses.py"""
+
+import json
+
+from faq_index import FAQEntry
+from responses import FALLBACK_ANSWER, faq_entry_json, faq_response, fallback_response, llm_response
+
+ENTRY = FAQEntry.from_dict("what is mwee", {
+    "answer": 'A "Meaningful Watershed" experience — see\nhttps://example.org',
+    "category": "programs",
+    "related": ["mwee requirements"],
+    "url": None,
+})
+
+
+def test_faq_response():
+    response = faq_response(ENTRY)
+    assert response.source == "faq"
+    assert json.loads(response.body) == {**ENTRY.to_dict(), "source": "faq"}
+
+
+def test_faq_entry_json():
+    assert json.loads(faq_entry_json(ENTRY)) == ENTRY.to_dict()
+
+
+def test_llm_response_escapes_answer():
+    answer = 'Line one\n"quoted" \\ back—slash \x00 and emoji \U0001F331'
+    for source in ("ollama", "claude", "ollama"):
+        response = llm_response(answer, source)
+        assert response.source == source
+        assert json.loads(response.body) == {
+            "answer": answer,
+            "category": "ai_generated",
+            "related": [],
+            "source": source,
+        }
+
+
+def test_fallback_response_quotes_query():
+    query = 'Où est "le" bureau?\n'
+    body = json.loads(fallback_response(query).body)
+    assert body["answer"] == FALLBACK_ANSWER.format(query=query)
+    assert body["source"] == body["category"] == "fallback"
@@ -0,0 +1,135 @@
+"""Tests for shared_state.py (Redis behaviour via fakeredis)"""
+
+import threading
+import time
+
+import fakeredis
+import pytest
+import redis
+
+from answer_store import AnswerCache
+from shared_state import KEY_PREFIX, LocalState, RedisState
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def redis_state(server, **kwargs) -> RedisState:
+    return RedisState(fakeredis.FakeRedis(server=server), LocalState(AnswerCache()), **kwargs)
+
+
+def server_has_lock(server, key: str) -> bool:
+    return bool(fakeredis.FakeRedis(server=server).exists(KEY_PREFIX + "lock:" + key))
+
+
+def test_token_bucket_limits_bursts(server):
+    state = redis_state(server)
+    results = [state.allow("chat:1.2.3.4", rate=0.01, burst=3) for _ in range(5)]
+    assert results == [True, True, True, False, False]
+    # Buckets are per client
+    assert state.allow("chat:5.6.7.8", rate=0.01, burst=3)
+
+
+def test_token_bucket_is_shared_between_workers(server):
+    a, b = redis_state(server), redis_state(server)
+    assert a.allow("chat:ip", rate=0.01, burst=2)
+    assert b.allow("chat:ip", rate=0.01, burst=2)
+    assert not a.allow("chat:ip", rate=0.01, burst=2)
+
+
+def test_single_flight_across_workers(server):
+    leader_state, follower_state = redis_state(server), redis_state(server)
+
+    assert leader_state.get_or_acquire("what is mwee", 5) == (None, True)
+    assert follower_state.get_or_acquire("what is mwee", 5) == (None, False)
+
+    def answer():
+        time.sleep(0.1)
+        leader_state.put_answer("what is mwee", "An answer.", "ollama")
+        leader_state.release("what is mwee")
+
+    threading.Thread(target=answer).start()
+    assert follower_state.wait_for_answer("what is mwee", 5) == ("An answer.", "ollama")
+    assert not server_has_lock(server, "what is mwee")
+
+    # Later lookups hit the shared answer without taking the lock
+    third = redis_state(server)
+    assert third.get_or_acquire("what is mwee", 5) == (("An answer.", "ollama"), False)
+    assert not server_has_lock(server, "what is mwee")
+
+
+def test_lookup_and_lock_share_one_round_trip(server, monkeypatch):
+    state = redis_state(server)
+    pipelines = []
+    pipeline = state.client.pipeline
+    monkeypatch.setattr(state.client, "pipeline", lambda **kw: pipelines.append(kw) or pipeline(**kw))
+    for name in ("get", "set", "exists"):
+        monkeypatch.setattr(state.client, name, None)  # any direct call would fail
+
+    assert state.get_or_acquire("q", 5) == (None, True)
+    assert len(pipelines) == 1
+
+
+def test_waiting_polls_with_one_round_trip(server, monkeypatch):
+    leader_state, follower_state = redis_state(server), redis_state(server)
+    leader_state.get_or_acquire("q", 5)
+    for name in ("get", "exists"):
+        monkeypatch.setattr(follower_state.client, name, None)  # any direct call would fail
+
+    threading.Timer(0.1, lambda: (leader_state.put_answer("q", "A.", "ollama"), leader_state.release("q"))).start()
+    assert follower_state.wait_for_answer("q", 5) == ("A.", "ollama")
+
+
+def test_waiting_stops_when_leader_gives_up(server):
+    leader_state, follower_state = redis_state(server), redis_state(server)
+    leader_state.get_or_acquire("q", 5)
+    threading.Timer(0.1, leader_state.release, ["q"]).start()
+    start = time.monotonic()
+    assert follower_state.wait_for_answer("q", 5) is None
+    assert time.monotonic() - start < 2
+
+
+def test_metrics_are_flushed_in_batches(server):
+    a = redis_state(server, flush_interval=3600)
+    b = redis_state(server, flush_interval=3600)
+    for _ in range(3):
+        a.incr("responses_faq")
+    b.incr("responses_faq")
+    b.incr("responses_ollama", 2)
+
+    # Buffered until a flush
+    assert fakeredis.FakeRedis(server=server).hgetall(KEY_PREFIX + "metrics") == {}
+    a.flush()
+    assert b.counters() == {"responses_faq": 4, "responses_ollama": 2}
+
+
+def test_falls_back_to_local_state_when_server_is_down(server):
+    state = redis_state(server, retry_interval=3600)
+    server.connected = False
+
+    assert state.get_or_acquire("q", 5) == (None, True)
+    assert state.backend == "local (redis unavailable)"
+    state.put_answer("q", "Local answer.", "ollama")
+    state.release("q")
+    assert state.get_or_acquire("q", 5) == (("Local answer.", "ollama"), False)
+    assert state.allow("chat:ip", rate=0.01, burst=1)
+    assert not state.allow("chat:ip", rate=0.01, burst=1)
+    state.incr("responses_faq")
+    assert state.counters() == {"responses_faq": 1}
+
+
+def test_retries_server_after_retry_interval(server):
+    state = redis_state(server, retry_interval=0.05)
+    server.connected = False
+    with pytest.raises(redis.ConnectionError):
+        state.client.ping()
+    state.get_or_acquire("q", 5)
+    assert not state.available
+
+    server.connected = True
+    time.sleep(0.06)
+    assert state.available
+    assert state.get_or_acquire("other", 5) == (None, True)
+    assert server_has_lock(server, "other")